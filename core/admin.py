@@ -1,13 +1,188 @@
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.contrib import admin
-from .models import Appointment
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.db import connection
+from django.db.models import Max, Min, Q
+from .models import Appointment, AppointmentArchive, Location, SlotClaim, WaitlistEntry
+from .search import search_appointments
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+CURSOR_AFTER_VAR = 'after'
+CURSOR_BEFORE_VAR = 'before'
+# generate_cancel_code() -> token_urlsafe(6) -> 8 karakter
+CANCEL_CODE_RE = re.compile(r'[A-Za-z0-9_-]{8}')
+
+def encode_cursor(obj) -> str:
+    us = (obj.start_datetime - EPOCH) // timedelta(microseconds=1)
+    return f"{us}.{obj.pk}"
+
+def decode_cursor(value: str):
+    try:
+        us, pk = value.split('.', 1)
+        return EPOCH + timedelta(microseconds=int(us)), int(pk)
+    except ValueError:
+        raise IncorrectLookupParameters(f"Invalid cursor: {value!r}")
+
+def estimated_table_rows(model) -> int:
+    """Tablo satır sayısı tahmini; COUNT(*) yerine planner istatistiği veya PK aralığı."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] >= 0:
+            return row[0]
+    bounds = model._default_manager.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+    return bounds['last'] - bounds['first'] + 1
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist with seek pagination on (start_datetime, id) instead of OFFSET,
+    and bounded/estimated counts instead of COUNT(*) over the whole table.
+    """
+    count_limit = 1000
+
+    def __init__(self, request, *args, **kwargs):
+        # Cursor parametreleri filtre olarak yorumlanmasın
+        self.cursor_after = request.GET.get(CURSOR_AFTER_VAR)
+        self.cursor_before = request.GET.get(CURSOR_BEFORE_VAR)
+        if self.cursor_after or self.cursor_before:
+            params = request.GET.copy()
+            params.pop(CURSOR_AFTER_VAR, None)
+            params.pop(CURSOR_BEFORE_VAR, None)
+            request.GET = params
+        super().__init__(request, *args, **kwargs)
+
+    def get_ordering(self, request, queryset):
+        return ['-start_datetime', '-pk']
+
+    @property
+    def has_date_filter(self):
+        # date_hierarchy parametreleri Django'nun has_active_filters'ına dahil değil
+        field = self.date_hierarchy
+        return bool(field) and any(f'{field}__{part}' in self.params for part in ('year', 'month', 'day'))
+
+    def get_results(self, request):
+        per_page = self.list_per_page
+        qs = self.queryset
+        if self.cursor_before:
+            ts, pk = decode_cursor(self.cursor_before)
+            rows = list(
+                qs.filter(Q(start_datetime__gt=ts) | Q(start_datetime=ts, pk__gt=pk))
+                .order_by('start_datetime', 'pk')[:per_page + 1]
+            )
+            has_prev = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            has_next = True
+        else:
+            if self.cursor_after:
+                ts, pk = decode_cursor(self.cursor_after)
+                qs = qs.filter(Q(start_datetime__lt=ts) | Q(start_datetime=ts, pk__lt=pk))
+            rows = list(qs[:per_page + 1])
+            has_next = len(rows) > per_page
+            rows = rows[:per_page]
+            has_prev = bool(self.cursor_after)
+
+        if self.has_active_filters or self.has_date_filter or self.query:
+            # LIMIT'li alt sorgu: en fazla count_limit satır sayılır
+            result_count = self.queryset.order_by()[:self.count_limit + 1].count() if (has_next or has_prev) else len(rows)
+            if result_count > self.count_limit:
+                result_count = self.count_limit
+                self.result_count_display = f"{result_count}+"
+            else:
+                self.result_count_display = str(result_count)
+        else:
+            if has_next or has_prev:
+                result_count = estimated_table_rows(self.model)
+                self.result_count_display = f"~{result_count}"
+            else:
+                result_count = len(rows)
+                self.result_count_display = str(result_count)
+
+        self.result_count = result_count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_next or has_prev
+        self.paginator = None
+        self.next_page_url = self.get_query_string({CURSOR_AFTER_VAR: encode_cursor(rows[-1])}) if has_next and rows else None
+        self.prev_page_url = self.get_query_string({CURSOR_BEFORE_VAR: encode_cursor(rows[0])}) if has_prev and rows else None
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'time_zone', 'slot_hours', 'work_weekdays')
+    prepopulated_fields = {'slug': ('name',)}
 
 @admin.register(Appointment)
 class AppointmentAdmin(admin.ModelAdmin):
     list_display = (
         'first_name', 'last_name',
-        'start_datetime',
+        'location', 'start_datetime',
         'therapy_type', 'session_format',
         'cancel_code', 'created_at'
     )
-    search_fields = ('first_name', 'last_name', 'cancel_code')
-    list_filter = ('start_datetime', 'therapy_type', 'session_format')
+    # Arama get_search_results içinde: kod için unique index, isim için core.search
+    search_fields = ('cancel_code', 'first_name', 'last_name')
+    search_help_text = 'Reference code (exact match) or client name (prefix and typo tolerant).'
+    search_result_limit = 500
+    list_filter = ('location', 'therapy_type', 'session_format')
+    list_select_related = ('location',)
+    date_hierarchy = 'start_datetime'
+    sortable_by = ()
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if CANCEL_CODE_RE.fullmatch(term):
+            # Referans kodu: unique index üzerinden tek satır, isim taraması yok
+            exact = queryset.filter(cancel_code=term)
+            if exact.exists():
+                return exact, False
+        if not term:
+            return queryset, False
+        ids = [a.pk for a in search_appointments(term, limit=self.search_result_limit)]
+        return queryset.filter(pk__in=ids), False
+
+@admin.register(AppointmentArchive)
+class AppointmentArchiveAdmin(admin.ModelAdmin):
+    list_display = (
+        'first_name', 'last_name',
+        'location', 'start_datetime',
+        'therapy_type', 'session_format',
+        'cancel_code', 'archived_at'
+    )
+    search_fields = ('=cancel_code',)
+    list_select_related = ('location',)
+    date_hierarchy = 'start_datetime'
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        'first_name', 'last_name',
+        'location', 'window_start', 'window_end',
+        'therapy_type', 'session_format',
+        'status', 'code', 'created_at'
+    )
+    search_fields = ('=code',)
+    list_filter = ('status', 'location', 'therapy_type')
+    list_select_related = ('location',)
+
+@admin.register(SlotClaim)
+class SlotClaimAdmin(admin.ModelAdmin):
+    list_display = ('entry', 'start_datetime', 'expires_at', 'created_at')
+    raw_id_fields = ('entry',)
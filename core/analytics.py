@@ -0,0 +1,132 @@
+"""
+Kullanım (utilization) rollup'ları.
+
+Rezervasyon ve iptal anında `DailyUtilization` satırları artırılır/azaltılır; dashboard sadece
+bu tabloyu okur, böylece sorgu maliyeti randevu sayısına değil tarih aralığına bağlıdır.
+`rebuild_utilization` komutu rollup'ları randevu + arşiv tablolarından yeniden hesaplar.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .locations import all_locations, locations_by_id, slot_instants
+from .models import Appointment, AppointmentArchive, DailyUtilization
+
+def bucket_for(appt) -> dict:
+    # Gün/saat kırılımı randevunun lokasyonundaki yerel saate göre yapılır
+    location = locations_by_id().get(appt.location_id)
+    local = appt.start_datetime.astimezone(location.tz) if location else timezone.localtime(appt.start_datetime)
+    return {
+        'date': local.date(),
+        'hour': local.hour,
+        'therapy_type': appt.therapy_type,
+        'session_format': appt.session_format,
+    }
+
+def record_booking(appt):
+    bucket = bucket_for(appt)
+    if DailyUtilization.objects.filter(**bucket).update(booked=F('booked') + 1):
+        return
+    try:
+        with transaction.atomic():
+            DailyUtilization.objects.create(booked=1, **bucket)
+    except IntegrityError:
+        # Aynı anda başka bir istek satırı oluşturdu
+        DailyUtilization.objects.filter(**bucket).update(booked=F('booked') + 1)
+
+def record_cancellation(appt):
+    DailyUtilization.objects.filter(booked__gt=0, **bucket_for(appt)).update(booked=F('booked') - 1)
+
+def rebuild(start: date, end: date) -> int:
+    """[start, end] aralığındaki rollup'ları sıfırdan hesaplar; yazılan satır sayısını döner."""
+    counts = defaultdict(int)
+    for location in all_locations():
+        tz = location.tz
+        # Yerel gün sınırları önce UTC anlarına çevrilir: (location, start_datetime) index'i kullanılır
+        since = datetime.combine(start, time.min, tzinfo=tz)
+        until = datetime.combine(end + timedelta(days=1), time.min, tzinfo=tz)
+        for model in (Appointment, AppointmentArchive):
+            rows = (
+                model.objects
+                .filter(location=location, start_datetime__gte=since, start_datetime__lt=until)
+                .annotate(day=TruncDate('start_datetime', tzinfo=tz), hour=ExtractHour('start_datetime', tzinfo=tz))
+                .values('day', 'hour', 'therapy_type', 'session_format')
+                .annotate(n=Count('id'))
+                .order_by()
+            )
+            for row in rows:
+                counts[(row['day'], row['hour'], row['therapy_type'], row['session_format'])] += row['n']
+
+    with transaction.atomic():
+        DailyUtilization.objects.filter(date__gte=start, date__lte=end).delete()
+        DailyUtilization.objects.bulk_create([
+            DailyUtilization(date=d, hour=h, therapy_type=t, session_format=f, booked=n)
+            for (d, h, t, f), n in sorted(counts.items())
+        ])
+    return len(counts)
+
+def utilization_report(start: date, end: date, locations) -> dict:
+    """
+    Saat, haftanın günü, terapi türü ve seans formatına göre dolu seans sayıları.
+    Rollup'lar lokasyonun yerel gün/saatine göre tutulduğundan kapasite de her lokasyonun kendi
+    takviminden (yaz saati boşlukları hariç) yerel saat ve güne göre toplanır.
+    """
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    hour_capacity = defaultdict(int)
+    weekday_capacity = defaultdict(int)
+    for location in locations:
+        for d in days:
+            for dt in slot_instants(location, d):
+                hour_capacity[dt.hour] += 1
+                weekday_capacity[d.weekday()] += 1
+
+    by_hour = defaultdict(int)
+    by_weekday = defaultdict(int)
+    by_therapy_type = defaultdict(int)
+    by_session_format = defaultdict(int)
+    total = 0
+    rows = (
+        DailyUtilization.objects
+        .filter(date__gte=start, date__lte=end)
+        .values_list('date', 'hour', 'therapy_type', 'session_format', 'booked')
+    )
+    for d, hour, therapy_type, session_format, booked in rows:
+        by_hour[hour] += booked
+        by_weekday[d.weekday()] += booked
+        by_therapy_type[therapy_type] += booked
+        by_session_format[session_format] += booked
+        total += booked
+
+    def rate(booked, capacity):
+        return round(booked / capacity, 4) if capacity else None
+
+    capacity = sum(hour_capacity.values())
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'booked': total,
+        'capacity': capacity,
+        'utilization': rate(total, capacity),
+        'by_hour': [
+            {'hour': h, 'booked': by_hour[h], 'capacity': hour_capacity[h],
+             'utilization': rate(by_hour[h], hour_capacity[h])}
+            for h in sorted(hour_capacity.keys() | {h for h, n in by_hour.items() if n})
+        ],
+        'by_weekday': [
+            {'weekday': wd, 'booked': by_weekday[wd], 'capacity': weekday_capacity[wd],
+             'utilization': rate(by_weekday[wd], weekday_capacity[wd])}
+            for wd in sorted(weekday_capacity.keys() | {wd for wd, n in by_weekday.items() if n})
+        ],
+        'by_therapy_type': [
+            {'therapy_type': key, 'label': label, 'booked': by_therapy_type[key], 'share': rate(by_therapy_type[key], total)}
+            for key, label in Appointment.THERAPY_TYPE_CHOICES
+        ],
+        'by_session_format': [
+            {'session_format': key, 'label': label, 'booked': by_session_format[key], 'share': rate(by_session_format[key], total)}
+            for key, label in Appointment.SESSION_FORMAT_CHOICES
+        ],
+    }
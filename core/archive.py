@@ -0,0 +1,41 @@
+"""
+Hot/cold ayrımı: geçmiş randevular `AppointmentArchive` tablosuna küçük partiler halinde taşınır.
+Kod ile yapılan aramalar önce canlı tabloya, bulunamazsa arşive bakar.
+"""
+from django.db import transaction
+
+from .models import Appointment, AppointmentArchive
+
+ARCHIVED_FIELDS = [
+    'id', 'first_name', 'last_name', 'location_id', 'start_datetime',
+    'therapy_type', 'session_format', 'cancel_code', 'created_at', 'search_text',
+]
+
+def archive_batch(cutoff, batch_size: int) -> int:
+    """
+    start_datetime < cutoff olan en eski `batch_size` randevuyu tek transaction'da taşır. Arşivde
+    aynı id/kod zaten varsa IntegrityError ile tüm parti geri alınır; hiçbir satır kaybolmaz.
+    """
+    with transaction.atomic():
+        batch = list(
+            Appointment.objects
+            .filter(start_datetime__lt=cutoff)
+            .order_by('start_datetime')
+            .select_for_update()[:batch_size]
+        )
+        if not batch:
+            return 0
+        AppointmentArchive.objects.bulk_create(
+            [AppointmentArchive(**{f: getattr(a, f) for f in ARCHIVED_FIELDS}) for a in batch],
+        )
+        Appointment.objects.filter(pk__in=[a.pk for a in batch]).delete()
+    return len(batch)
+
+def find_by_code(code: str):
+    """Canlı randevu ya da arşivlenmiş randevu; hiçbiri yoksa None."""
+    if not code:
+        return None
+    appt = Appointment.objects.select_related('location').filter(cancel_code=code).first()
+    if appt is None:
+        appt = AppointmentArchive.objects.select_related('location').filter(cancel_code=code).first()
+    return appt
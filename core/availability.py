@@ -0,0 +1,34 @@
+"""
+Lokasyon + gün bazlı müsaitlik sürümleri (availability version).
+
+Her gün `day:<lokasyon id>:<tarih>` surrogate key'i ile temsil edilir; tarih lokasyonun kendi saat
+diliminde hesaplanır. O güne ait randevu eklendiğinde/silindiğinde anahtar purge edilir; takvim
+fragment'ları ve tam sayfa önbelleği bu sürümleri anahtarlarına katar. Lokasyonun takvimi
+(saatler, çalışma günleri, saat dilimi) değişince `location:<id>` purge edilir ve tüm günleri düşer.
+"""
+from . import surrogate
+
+def _location_id(location) -> int:
+    return getattr(location, 'pk', location)
+
+def location_key(location) -> str:
+    return f"location:{_location_id(location)}"
+
+def day_key(location, d) -> str:
+    return f"day:{_location_id(location)}:{d.isoformat()}"
+
+def day_versions(location, days) -> dict:
+    """{day: version}; sürüm lokasyon ve gün sürümlerinin birleşimidir."""
+    by_key = {day_key(location, d): d for d in days}
+    loc_key = location_key(location)
+    found = surrogate.versions([loc_key, *by_key])
+    return {d: f"{found[loc_key]}.{found[k]}" for k, d in by_key.items()}
+
+def bump_day(location, d):
+    surrogate.purge(day_key(location, d))
+
+def bump_location(location):
+    surrogate.purge(location_key(location))
+
+def day_of(dt, tz):
+    return dt.astimezone(tz).date()
@@ -0,0 +1,15 @@
+from django.conf import settings
+
+from .page_cache import CSRF_PLACEHOLDER
+
+def assets(request):
+    return {'self_hosted_assets': settings.SELF_HOSTED_ASSETS}
+
+def page_cache(request):
+    """
+    Tam sayfa önbelleği için render ediliyorsa CSRF token yerine yer tutucu koy; base.html
+    `csrf_placeholder` varken gerçek token'ı `csrf_token` endpoint'inden alıp formlara yazar.
+    """
+    if getattr(request, 'page_cache_capture', False):
+        return {'csrf_token': CSRF_PLACEHOLDER, 'csrf_placeholder': CSRF_PLACEHOLDER}
+    return {}
@@ -18,3 +18,27 @@ class BookingForm(forms.Form):
 
     therapy_type = forms.ChoiceField(choices=THERAPY_TYPE_CHOICES)
     session_format = forms.ChoiceField(choices=SESSION_FORMAT_CHOICES)
+
+class WaitlistForm(forms.Form):
+    ANY_HOUR_CHOICE = ('', 'Any time that day')
+
+    first_name = forms.CharField(max_length=80)
+    last_name = forms.CharField(max_length=80)
+    day = forms.DateField()
+    hour = forms.ChoiceField(choices=[ANY_HOUR_CHOICE], required=False)
+
+    therapy_type = forms.ChoiceField(
+        choices=BookingForm.THERAPY_TYPE_CHOICES,
+        widget=forms.Select(attrs={'class': 'w-full px-4 py-2 border border-gray-300 rounded-md'}),
+    )
+    session_format = forms.ChoiceField(
+        choices=BookingForm.SESSION_FORMAT_CHOICES,
+        widget=forms.Select(attrs={'class': 'w-full px-4 py-2 border border-gray-300 rounded-md'}),
+    )
+
+    def __init__(self, *args, location, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Saat seçenekleri lokasyonun kendi slot saatleri (yerel saat)
+        self.fields['hour'].choices = [self.ANY_HOUR_CHOICE] + [
+            (str(h), f"{h:02d}:00") for h in sorted(location.slot_hours)
+        ]
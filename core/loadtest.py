@@ -0,0 +1,319 @@
+"""
+Kapasite planlaması: sentetik randevu verisi ve süreç içi trafik tekrarı (replay).
+
+`generate_appointments` lokasyonların gerçek slot takvimindeki boş slotlara istenen sayıda randevu
+üretir; gerekirse pencereyi geçmişe doğru genişletir (bulk_create; rollup, doluluk index'i ve
+takvim önbelleği sonra toplu güncellenir).
+`run_benchmark` istek karışımını (erişim logundan ya da ağırlıklardan) `django.test.Client`
+thread'leri ile farklı eşzamanlılık seviyelerinde çalıştırır ve endpoint başına throughput ile
+p50/p95/p99 gecikmeleri raporlar. Tüm yığın (middleware, view, şablon, DB) aynı süreçte ölçülür;
+GIL nedeniyle sonuçlar bir worker'ın kapasitesini gösterir, host'unkini değil.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+import itertools
+import math
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+from . import occupancy, surrogate
+from .analytics import rebuild
+from .availability import day_key
+from .locations import all_locations, slot_instants
+from .models import Appointment
+from .text import name_search_text
+from .views import booked_starts
+
+FIRST_NAMES = [
+    'Ayşe', 'Mehmet', 'Zeynep', 'Can', 'Elif', 'Emre', 'Deniz', 'Selin', 'Burak', 'Ece',
+    'Anna', 'James', 'Maria', 'David', 'Sofia', 'Lucas', 'Emma', 'Noah', 'Olivia', 'Liam',
+]
+LAST_NAMES = [
+    'Yılmaz', 'Kaya', 'Demir', 'Şahin', 'Çelik', 'Yıldız', 'Aydın', 'Öztürk', 'Arslan', 'Doğan',
+    'Smith', 'Johnson', 'Garcia', 'Müller', 'Rossi', 'Martin', 'Brown', 'Novak', 'Silva', 'Kowalski',
+]
+THERAPY_TYPES = [key for key, _ in Appointment.THERAPY_TYPE_CHOICES]
+SESSION_FORMATS = [key for key, _ in Appointment.SESSION_FORMAT_CHOICES]
+
+# Erişim loglarımızdaki oranlara yakın varsayılan karışım
+DEFAULT_MIX = {
+    'home': 25,
+    'book': 40,
+    'book_post': 4,
+    'appointments': 15,
+    'cancel_check': 12,
+    'cancel': 4,
+}
+WRITE_ENDPOINTS = {'book_post', 'cancel'}
+
+# Taban seviyeye göre p95 bu kattan fazla artınca endpoint doygun sayılır
+SATURATION_FACTOR = 2.0
+
+# Boş slot yetmezse pencere geçmişe doğru en fazla bu kadar gün genişletilir
+MAX_DAYS_BACK = 3650
+
+def _free_slots(location, start, end):
+    taken = booked_starts(location, start, end)
+    return [
+        (location, dt)
+        for i in range((end - start).days + 1)
+        for dt in slot_instants(location, start + timedelta(days=i))
+        if dt not in taken
+    ]
+
+def generate_appointments(count: int, days_back: int = 30, days_ahead: int = 14, seed: int = 0,
+                          batch_size: int = 1000):
+    """
+    [bugün - days_back, bugün + days_ahead] aralığındaki boş slotlara tam `count` randevu ekler;
+    (eklenen sayı, kullanılan days_back) döner. Boş slot yetmezse pencere MAX_DAYS_BACK'e kadar
+    geçmişe doğru genişletilir; yine yetmezse ValueError. Slotlar rastgele (seed ile tekrarlanabilir)
+    seçilir, mevcut randevular korunur.
+    """
+    rng = random.Random(seed)
+    locations = all_locations()
+    todays = {location.pk: timezone.now().astimezone(location.tz).date() for location in locations}
+    free = []
+    for location in locations:
+        today = todays[location.pk]
+        free += _free_slots(location, today - timedelta(days=days_back), today + timedelta(days=days_ahead))
+    while len(free) < count and days_back < MAX_DAYS_BACK:
+        # Sadece yeni eklenen (daha eski) günler taranır
+        new_back = min(max(days_back * 2, days_back + 30), MAX_DAYS_BACK)
+        for location in locations:
+            today = todays[location.pk]
+            free += _free_slots(location, today - timedelta(days=new_back), today - timedelta(days=days_back + 1))
+        days_back = new_back
+    if len(free) < count:
+        raise ValueError(
+            f"Only {len(free)} free slot(s) between {days_back} days back and {days_ahead} days ahead; "
+            f"cannot create {count} appointment(s)."
+        )
+    chosen = rng.sample(free, count)
+
+    appointments = []
+    for location, dt in chosen:
+        first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        appointments.append(Appointment(
+            first_name=first_name,
+            last_name=last_name,
+            location=location,
+            start_datetime=dt,
+            therapy_type=rng.choice(THERAPY_TYPES),
+            session_format=rng.choice(SESSION_FORMATS),
+            # bulk_create save() çağırmaz
+            search_text=name_search_text(first_name, last_name),
+        ))
+    with transaction.atomic():
+        Appointment.objects.bulk_create(appointments, batch_size=batch_size)
+
+    # bulk_create sinyal göndermez: etkilenen günler, rollup'lar ve doluluk index'i toplu güncellenir
+    days = {(location.pk, dt.astimezone(location.tz).date()) for location, dt in chosen}
+    surrogate.purge(*(day_key(location_id, d) for location_id, d in days))
+    if days:
+        local_days = [d for _, d in days]
+        rebuild(min(local_days), max(local_days))
+    occupancy.reconcile()
+    return len(appointments), days_back
+
+_request_line_re = re.compile(r'"(GET|POST|HEAD) (\S+) HTTP/[\d.]+"')
+
+def classify(method: str, path: str):
+    """(method, path) -> karışımdaki endpoint adı; tanınmayan istekler için None."""
+    try:
+        name = resolve(urlsplit(path).path).url_name
+    except Resolver404:
+        return None
+    if name == 'book':
+        return 'book_post' if method == 'POST' else 'book'
+    if name == 'cancel':
+        return 'cancel' if method == 'POST' else None
+    if name in DEFAULT_MIX:
+        return name
+    return None
+
+def parse_access_log(lines):
+    """Common/combined log satırları -> [(endpoint, path)]; statik dosyalar vb. atlanır."""
+    samples = []
+    for line in lines:
+        match = _request_line_re.search(line)
+        if match:
+            method, path = match.groups()
+            endpoint = classify(method, path)
+            if endpoint is not None:
+                samples.append((endpoint, path))
+    return samples
+
+def percentile(sorted_values, pct: float):
+    """Nearest-rank yüzdelik; boş listede None."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct * len(sorted_values) / 100) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+class Workload:
+    """Thread'ler arası paylaşılan istek kaynağı: kayıtlı log sırayla, yoksa ağırlıklı rastgele."""
+
+    def __init__(self, mix=None, samples=None):
+        self.samples = samples or []
+        self._next_sample = itertools.count()
+        mix = mix or DEFAULT_MIX
+        self.endpoints = [e for e, w in mix.items() if w > 0]
+        self.weights = [mix[e] for e in self.endpoints]
+        self._lock = threading.Lock()
+        self.codes = list(
+            Appointment.objects.filter(start_datetime__gt=timezone.now())
+            .order_by('?').values_list('cancel_code', flat=True)[:1000]
+        )
+        self.booked_codes = []
+        self.locations = all_locations()
+
+    def next_request(self, rng):
+        if self.samples:
+            endpoint, path = self.samples[next(self._next_sample) % len(self.samples)]
+        else:
+            endpoint, path = rng.choices(self.endpoints, self.weights)[0], None
+        return endpoint, getattr(self, f'_{endpoint}')(rng, path)
+
+    def _code(self, rng):
+        return rng.choice(self.codes) if self.codes else 'missing-code'
+
+    def _home(self, rng, path):
+        return 'get', path or reverse('home'), None
+
+    def _book(self, rng, path):
+        location = rng.choice(self.locations)
+        return 'get', path or f"{reverse('book')}?location={location.slug}", None
+
+    def _book_post(self, rng, path):
+        location = rng.choice(self.locations)
+        today = timezone.now().astimezone(location.tz).date()
+        slots = slot_instants(location, today + timedelta(days=rng.randint(1, 13)))
+        start = rng.choice(slots).isoformat() if slots else ''
+        return 'post', f"{reverse('book')}?location={location.slug}", {
+            'location': location.slug,
+            'first_name': rng.choice(FIRST_NAMES),
+            'last_name': rng.choice(LAST_NAMES),
+            'therapy_type': rng.choice(THERAPY_TYPES),
+            'session_format': rng.choice(SESSION_FORMATS),
+            'start': start,
+        }
+
+    def _appointments(self, rng, path):
+        return 'get', path or f"{reverse('appointments')}?code={self._code(rng)}", None
+
+    def _cancel_check(self, rng, path):
+        return 'get', path or f"{reverse('cancel_check')}?code={self._code(rng)}", None
+
+    def _cancel(self, rng, path):
+        # Sadece bu çalıştırmada alınan randevular iptal edilir; mevcut veri korunur
+        with self._lock:
+            code = self.booked_codes.pop() if self.booked_codes else None
+        if code is None:
+            # Henüz iptal edilecek randevu yok: iptal sayfasını göster
+            return 'get', reverse('cancel', kwargs={'code': self._code(rng)}), None
+        return 'post', reverse('cancel', kwargs={'code': code}), {'confirm_code': code}
+
+    def record_booking(self, response):
+        code = response.cookies.get('appointment_code')
+        if code is not None and code.value:
+            with self._lock:
+                self.booked_codes.append(code.value)
+
+def _worker(workload, seed, deadline, max_requests, results):
+    rng = random.Random(seed)
+    host = next((h for h in settings.ALLOWED_HOSTS if h not in ('*',) and not h.startswith('.')), 'localhost')
+    client = Client(HTTP_HOST=host, raise_request_exception=False)
+    done = 0
+    try:
+        while time.perf_counter() < deadline and (max_requests is None or done < max_requests):
+            endpoint, (method, path, data) = workload.next_request(rng)
+            started = time.perf_counter()
+            response = client.get(path) if method == 'get' else client.post(path, data)
+            elapsed = time.perf_counter() - started
+            if endpoint == 'book_post':
+                workload.record_booking(response)
+            results.append((endpoint, elapsed, response.status_code >= 500))
+            done += 1
+    finally:
+        connections.close_all()
+
+def run_level(workload, concurrency: int, duration: float, requests_per_worker=None, seed: int = 0) -> dict:
+    """Bir eşzamanlılık seviyesini çalıştırır; {endpoint: istatistik} ve toplam döner."""
+    results = []
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=_worker, args=(workload, seed * 1000 + i, deadline, requests_per_worker, results))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    by_endpoint = defaultdict(list)
+    errors = Counter()
+    for endpoint, elapsed, failed in results:
+        by_endpoint[endpoint].append(elapsed)
+        errors[endpoint] += failed
+
+    endpoints = {}
+    for endpoint, latencies in sorted(by_endpoint.items()):
+        latencies.sort()
+        endpoints[endpoint] = {
+            'requests': len(latencies),
+            'errors': errors[endpoint],
+            'throughput': len(latencies) / wall if wall else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+        }
+    return {
+        'concurrency': concurrency,
+        'seconds': wall,
+        'requests': len(results),
+        'throughput': len(results) / wall if wall else 0.0,
+        'endpoints': endpoints,
+    }
+
+def first_saturated(levels):
+    """
+    Taban (en düşük eşzamanlılık) p95'ine göre en erken SATURATION_FACTOR katına ulaşan endpoint:
+    (endpoint, eşzamanlılık, p95 oranı) ya da hiçbiri doymadıysa None. Karışım sabit olduğundan
+    throughput tüm endpoint'lerde birlikte düzleşir; ayırt edici olan gecikme artışıdır.
+    """
+    if len(levels) < 2:
+        return None
+    baseline = levels[0]['endpoints']
+    candidates = []
+    for level in levels[1:]:
+        for endpoint, stats in level['endpoints'].items():
+            base = baseline.get(endpoint)
+            if not base or not base['p95']:
+                continue
+            ratio = stats['p95'] / base['p95']
+            if ratio >= SATURATION_FACTOR:
+                candidates.append((level['concurrency'], -ratio, endpoint))
+        if candidates:
+            concurrency, neg_ratio, endpoint = min(candidates)
+            return endpoint, concurrency, -neg_ratio
+    return None
+
+def run_benchmark(concurrency_levels, duration: float = 10.0, mix=None, samples=None,
+                  requests_per_worker=None, seed: int = 0) -> dict:
+    workload = Workload(mix=mix, samples=samples)
+    levels = [
+        run_level(workload, c, duration, requests_per_worker=requests_per_worker, seed=seed)
+        for c in concurrency_levels
+    ]
+    return {'levels': levels, 'saturated': first_saturated(levels)}
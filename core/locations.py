@@ -0,0 +1,74 @@
+"""
+Lokasyonlar ve lokasyon bazlı slot takvimi.
+
+Lokasyon listesi önbellekte tutulur (Location kaydedilince/silinince temizlenir), böylece
+istek başına lokasyon sorgusu yapılmaz. Temizleme sadece paylaşımlı önbellekte (CACHE_URL) tüm
+worker'lara ulaşır; süreç içi önbellekte liste kısa süre sonra kendiliğinden yenilenir. Bir lokasyonun bir gündeki slot anlarının UTC
+karşılıkları (yaz saati geçişleri dahil) bir kez hesaplanıp süreç içinde saklanır.
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Location
+
+LOCATIONS_CACHE_KEY = 'locations:all'
+# Paylaşımlı önbellek yokken diğer worker'lardaki değişiklik en geç bu kadar saniyede görünür
+LOCAL_LOCATIONS_TIMEOUT = 60
+
+def all_locations():
+    locations = cache.get(LOCATIONS_CACHE_KEY)
+    if locations is None:
+        locations = list(Location.objects.all())
+        timeout = None if getattr(settings, 'SHARED_CACHE', None) else LOCAL_LOCATIONS_TIMEOUT
+        cache.set(LOCATIONS_CACHE_KEY, locations, timeout=timeout)
+    return locations
+
+def invalidate_locations():
+    cache.delete(LOCATIONS_CACHE_KEY)
+
+def get_location(slug=None):
+    """slug verilmezse varsayılan lokasyon; bulunamazsa None."""
+    slug = slug or settings.DEFAULT_LOCATION
+    for location in all_locations():
+        if location.slug == slug:
+            return location
+    return None
+
+def get_default_location():
+    location = get_location()
+    if location is None:
+        location, _ = Location.objects.get_or_create(
+            slug=settings.DEFAULT_LOCATION,
+            defaults={'name': settings.DEFAULT_LOCATION.title()},
+        )
+        invalidate_locations()
+    return location
+
+def locations_by_id():
+    return {location.pk: location for location in all_locations()}
+
+@lru_cache(maxsize=16384)
+def _slot_instants(time_zone: str, hours: tuple, weekdays: frozenset, d: date) -> tuple:
+    if d.weekday() not in weekdays:
+        return ()
+    tz = ZoneInfo(time_zone)
+    instants = []
+    for h in hours:
+        dt = datetime(d.year, d.month, d.day, h, 0, tzinfo=tz)
+        # Yaz saati geçişinde var olmayan yerel saatler atlanır
+        if dt.astimezone(dt_timezone.utc).astimezone(tz).hour != h:
+            continue
+        instants.append(dt)
+    return tuple(instants)
+
+def slot_instants(location, d: date) -> tuple:
+    """Lokasyonun `d` yerel günündeki slot başlangıçları (aware, lokasyon saat diliminde)."""
+    return _slot_instants(location.time_zone, tuple(location.slot_hours), frozenset(location.work_weekdays), d)
+
+def precompute_slots(location, start: date, days: int):
+    for i in range(days):
+        slot_instants(location, start + timedelta(days=i))
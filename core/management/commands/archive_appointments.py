@@ -0,0 +1,50 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+from django.utils import timezone
+
+from core.archive import archive_batch
+
+class Command(BaseCommand):
+    help = "Move appointments older than a cutoff into AppointmentArchive in small, throttled batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=30, help="Archive appointments that started more than this many days ago (default: 30).")
+        parser.add_argument('--before', help="Explicit cutoff as an ISO date/datetime; overrides --days.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--sleep', type=float, default=0.5, help="Seconds to pause between batches.")
+        parser.add_argument('--max-batches', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['before']:
+            try:
+                cutoff = datetime.fromisoformat(options['before'])
+            except ValueError:
+                raise CommandError(f"Invalid --before value: {options['before']!r}")
+            if timezone.is_naive(cutoff):
+                cutoff = timezone.make_aware(cutoff)
+        else:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+
+        if cutoff > timezone.now():
+            raise CommandError(f"Cutoff {cutoff.isoformat()} is in the future; only past appointments can be archived.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+
+        total = batches = 0
+        while options['max_batches'] is None or batches < options['max_batches']:
+            try:
+                moved = archive_batch(cutoff, options['batch_size'])
+            except IntegrityError as exc:
+                raise CommandError(f"Batch {batches + 1} rolled back, archive already has a conflicting row: {exc}")
+            if not moved:
+                break
+            total += moved
+            batches += 1
+            self.stdout.write(f"Batch {batches}: archived {moved} appointment(s).")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {total} appointment(s) older than {cutoff.isoformat()}."))
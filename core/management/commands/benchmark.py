@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import DEFAULT_MIX, WRITE_ENDPOINTS, parse_access_log, run_benchmark
+
+class Command(BaseCommand):
+    help = (
+        "Replay a synthetic or recorded request mix in-process with django.test.Client threads and report "
+        "per-endpoint throughput and latency per concurrency level. Bookings and cancellations write to the "
+        "configured database: run it against a scratch copy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', default='1,2,4,8', help="Comma-separated thread counts (default: 1,2,4,8).")
+        parser.add_argument('--duration', type=float, default=10.0, help="Seconds per concurrency level (default: 10).")
+        parser.add_argument('--requests', type=int, default=None, help="Stop each thread after this many requests.")
+        parser.add_argument('--mix', help=f"Endpoint weights, e.g. home=25,book=40 (endpoints: {', '.join(DEFAULT_MIX)}).")
+        parser.add_argument('--log', help="Access log (common/combined format) to replay instead of a synthetic mix.")
+        parser.add_argument('--read-only', action='store_true', help="Leave out bookings and cancellations.")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def _parse_mix(self, value):
+        mix = {}
+        for part in value.split(','):
+            name, _, weight = part.partition('=')
+            name = name.strip()
+            if name not in DEFAULT_MIX:
+                raise CommandError(f"Unknown endpoint in --mix: {name!r}")
+            try:
+                mix[name] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight for {name!r}: {weight!r}")
+        return mix
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(c) for c in options['concurrency'].split(',')]
+        except ValueError:
+            raise CommandError(f"Invalid --concurrency value: {options['concurrency']!r}")
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency levels must be positive.")
+
+        mix = self._parse_mix(options['mix']) if options['mix'] else dict(DEFAULT_MIX)
+        samples = None
+        if options['log']:
+            try:
+                with open(options['log'], encoding='utf-8', errors='replace') as fh:
+                    samples = parse_access_log(fh)
+            except OSError as exc:
+                raise CommandError(str(exc))
+            if not samples:
+                raise CommandError("No replayable requests found in the log.")
+        if options['read_only']:
+            mix = {k: v for k, v in mix.items() if k not in WRITE_ENDPOINTS}
+            if samples:
+                samples = [s for s in samples if s[0] not in WRITE_ENDPOINTS]
+        if not any(mix.values()) and not samples:
+            raise CommandError("The request mix is empty.")
+
+        report = run_benchmark(
+            levels,
+            duration=options['duration'],
+            mix=mix,
+            samples=samples,
+            requests_per_worker=options['requests'],
+            seed=options['seed'],
+        )
+
+        def ms(seconds):
+            return f"{seconds * 1000:8.1f}" if seconds is not None else "       -"
+
+        for level in report['levels']:
+            self.stdout.write(
+                f"\nconcurrency={level['concurrency']}  {level['requests']} requests in {level['seconds']:.1f}s  "
+                f"({level['throughput']:.1f} req/s)"
+            )
+            self.stdout.write(f"{'endpoint':<14} {'reqs':>6} {'err':>4} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for endpoint, stats in level['endpoints'].items():
+                self.stdout.write(
+                    f"{endpoint:<14} {stats['requests']:>6} {stats['errors']:>4} {stats['throughput']:>8.1f} "
+                    f"{ms(stats['p50'])} {ms(stats['p95'])} {ms(stats['p99'])}"
+                )
+
+        saturated = report['saturated']
+        if saturated:
+            endpoint, concurrency, ratio = saturated
+            self.stdout.write(self.style.WARNING(
+                f"\nFirst to saturate: {endpoint} (p95 {ratio:.1f}x baseline at concurrency {concurrency})."
+            ))
+        else:
+            self.stdout.write("\nNo endpoint saturated at the tested concurrency levels.")
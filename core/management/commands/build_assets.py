@@ -0,0 +1,58 @@
+import shutil
+import subprocess
+import urllib.request
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Sürümler sabit; güncellerken URL'leri birlikte değiştirin
+VENDOR_ASSETS = {
+    'vendor/aos/aos.css': 'https://unpkg.com/aos@2.3.1/dist/aos.css',
+    'vendor/aos/aos.js': 'https://unpkg.com/aos@2.3.1/dist/aos.js',
+    'vendor/feather/feather.min.js': 'https://unpkg.com/feather-icons@4.29.2/dist/feather.min.js',
+}
+TAILWIND_INPUT = 'src/app.css'
+TAILWIND_OUTPUT = 'build/app.css'
+
+class Command(BaseCommand):
+    help = (
+        "Vendor third-party assets into static/ and compile the minified Tailwind stylesheet. "
+        "Commit the results, then run collectstatic to hash and pre-compress them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--refresh', action='store_true', help="Re-download vendored files that already exist.")
+        parser.add_argument('--skip-tailwind', action='store_true')
+
+    def handle(self, *args, **options):
+        static_dir = Path(settings.BASE_DIR) / 'static'
+        for name, url in VENDOR_ASSETS.items():
+            target = static_dir / name
+            if target.exists() and not options['refresh']:
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            self.stdout.write(f"Downloading {url}")
+            try:
+                with urllib.request.urlopen(url, timeout=30) as resp:
+                    target.write_bytes(resp.read())
+            except OSError as exc:
+                raise CommandError(f"Could not download {url}: {exc}")
+
+        if options['skip_tailwind']:
+            return
+        cli = shutil.which('tailwindcss')
+        command = [cli] if cli else (['npx', '--yes', 'tailwindcss@3'] if shutil.which('npx') else None)
+        if command is None:
+            raise CommandError("Tailwind CLI not found: install the standalone `tailwindcss` binary or Node.js (npx).")
+        subprocess.run(
+            command + [
+                '-c', str(Path(settings.BASE_DIR) / 'tailwind.config.js'),
+                '-i', str(static_dir / TAILWIND_INPUT),
+                '-o', str(static_dir / TAILWIND_OUTPUT),
+                '--minify',
+            ],
+            cwd=settings.BASE_DIR,
+            check=True,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Built {TAILWIND_OUTPUT}."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.loadtest import generate_appointments
+
+class Command(BaseCommand):
+    help = "Fill free slots with synthetic appointments (capacity planning / benchmarks). Do not run against production data."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, required=True, help="Number of appointments to create. The window is extended into the past until they fit.")
+        parser.add_argument('--days-back', type=int, default=30, help="Also fill past days (default: 30).")
+        parser.add_argument('--days-ahead', type=int, default=14, help="Fill days up to this many days ahead (default: 14).")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['count'] < 1 or options['days_back'] < 0 or options['days_ahead'] < 0:
+            raise CommandError("--count must be positive and --days-back/--days-ahead not negative.")
+        try:
+            created, days_back = generate_appointments(
+                options['count'],
+                days_back=options['days_back'],
+                days_ahead=options['days_ahead'],
+                seed=options['seed'],
+                batch_size=options['batch_size'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if days_back > options['days_back']:
+            self.stdout.write(f"Not enough free slots in the last {options['days_back']} day(s); extended the window to {days_back} days back.")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} appointment(s)."))
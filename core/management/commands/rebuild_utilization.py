@@ -0,0 +1,57 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+
+from core.analytics import rebuild
+from core.locations import locations_by_id
+from core.models import Appointment, AppointmentArchive
+
+class Command(BaseCommand):
+    help = "Recompute DailyUtilization rollups from appointments and the archive (backfills, repairs)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day (YYYY-MM-DD). Defaults to the earliest appointment.")
+        parser.add_argument('--end', help="Last day (YYYY-MM-DD). Defaults to the latest appointment.")
+        parser.add_argument('--chunk-days', type=int, default=31, help="Days rebuilt per transaction.")
+
+    def _bounds(self):
+        # Rollup günleri lokasyonun yerel günüdür: sınırlar her lokasyonun kendi saat diliminde alınır
+        locations = locations_by_id()
+        firsts, lasts = [], []
+        for model in (Appointment, AppointmentArchive):
+            rows = (
+                model.objects
+                .values('location_id')
+                .annotate(first=Min('start_datetime'), last=Max('start_datetime'))
+                .order_by()
+            )
+            for b in rows:
+                tz = locations[b['location_id']].tz
+                firsts.append(b['first'].astimezone(tz).date())
+                lasts.append(b['last'].astimezone(tz).date())
+        return (min(firsts), max(lasts)) if firsts else (None, None)
+
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        if start is None or end is None:
+            first, last = self._bounds()
+            if first is None:
+                self.stdout.write("No appointments found.")
+                return
+            start, end = start or first, end or last
+        if start > end:
+            raise CommandError("--start must not be after --end.")
+
+        written = 0
+        chunk = timedelta(days=max(options['chunk_days'], 1))
+        cursor = start
+        while cursor <= end:
+            chunk_end = min(cursor + chunk - timedelta(days=1), end)
+            written += rebuild(cursor, chunk_end)
+            cursor = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup row(s) for {start} .. {end}."))
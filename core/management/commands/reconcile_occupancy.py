@@ -0,0 +1,24 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.occupancy import reconcile
+
+class Command(BaseCommand):
+    help = "Rebuild the shared occupancy bitmap from the database and roll its horizon forward. Run periodically (e.g. cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help="First day of the horizon (YYYY-MM-DD). Defaults to yesterday.")
+
+    def handle(self, *args, **options):
+        try:
+            base = date.fromisoformat(options['start']) if options['start'] else None
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        result = reconcile(base)
+        if result is None:
+            self.stdout.write("Occupancy index is disabled (OCCUPANCY_INDEX_PATH is not set).")
+            return
+        base, changed = result
+        drift = "horizon moved" if changed is None else f"{changed} bit(s) corrected"
+        self.stdout.write(self.style.SUCCESS(f"Occupancy index rebuilt from {base}: {drift}."))
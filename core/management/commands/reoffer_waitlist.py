@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.waitlist import offer_free_slots, reoffer_expired_claims
+
+class Command(BaseCommand):
+    help = (
+        "Offer freed slots whose waitlist claims have expired to the next candidates, and offer any free slot "
+        "inside a waiting entry's window (covers backfills lost when a worker restarts). Run periodically (e.g. cron)."
+    )
+
+    def handle(self, *args, **options):
+        offered = reoffer_expired_claims() + offer_free_slots()
+        self.stdout.write(self.style.SUCCESS(f"Created {offered} new claim(s)."))
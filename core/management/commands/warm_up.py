@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.warmup import measure_imports, warm_up
+
+class Command(BaseCommand):
+    help = "Warm up this process (templates, DB connections, calendar cache) and report timings; optionally profile import time."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--imports', action='store_true',
+                            help="Import the WSGI entry point in a fresh interpreter with -X importtime and list the slowest modules.")
+        parser.add_argument('--top', type=int, default=15, help="Number of modules listed with --imports.")
+        parser.add_argument('--module', default='therapy_appointment_system.wsgi', help="Entry point measured with --imports.")
+
+    def handle(self, *args, **options):
+        for name, seconds in warm_up().items():
+            self.stdout.write(f"{name:<24} {seconds * 1000:8.1f} ms")
+
+        if not options['imports']:
+            return
+        try:
+            rows = measure_imports(options['module'])
+        except RuntimeError as exc:
+            raise CommandError(f"Could not import {options['module']}: {exc}")
+        total = sum(self_us for _, self_us, _, _ in rows)
+        self.stdout.write(f"\nImport of {options['module']}: {len(rows)} modules, {total / 1000:.1f} ms")
+        self.stdout.write(f"{'cumulative':>12} {'self':>10}  module")
+        for module, self_us, cumulative_us, _ in sorted(rows, key=lambda r: -r[2])[:options['top']]:
+            self.stdout.write(f"{cumulative_us / 1000:10.1f}ms {self_us / 1000:8.1f}ms  {module}")
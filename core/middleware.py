@@ -0,0 +1,113 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404
+from django.urls import Resolver404, resolve
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+
+from . import page_cache
+
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SHORT_CACHE_CONTROL = 'public, max-age=300'
+
+def accepted_encodings(header: str):
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q='):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(token.strip().lower())
+    return accepted
+
+class StaticAssetMiddleware:
+    """
+    STATIC_ROOT'taki (collectstatic çıktısı) dosyaları session/CSRF/mesaj katmanlarına girmeden
+    servis eder. İstemci destekliyorsa önceden üretilmiş .br/.gz kopyası gönderilir; hash'li
+    dosya adları bir yıl ve `immutable` ile önbelleğe alınabilir.
+    Dosya STATIC_ROOT'ta yoksa istek normal akışına devam eder (ör. DEBUG'da staticfiles finder).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = '/' + settings.STATIC_URL.lstrip('/')
+        self.root = settings.STATIC_ROOT
+
+    def __call__(self, request):
+        if self.root and request.method in ('GET', 'HEAD') and request.path.startswith(self.prefix):
+            response = self.serve(request, request.path[len(self.prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        served_path, encoding = path, None
+        for enc, ext in (('br', '.br'), ('gzip', '.gz')):
+            if enc in encodings and os.path.isfile(path + ext):
+                served_path, encoding = path + ext, enc
+                break
+
+        content_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            open(served_path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+            filename=os.path.basename(path),
+        )
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL if HASHED_NAME_RE.search(name) else SHORT_CACHE_CONTROL
+        return response
+
+class PageCacheMiddleware:
+    """
+    `cache_public_page` ile işaretli view'ların tam sayfa önbelleği. SessionMiddleware'den önce
+    yer alır: isabette yanıt session, auth ve mesaj katmanlarına girmeden (DB sorgusu olmadan)
+    döner. Iskada view normal zincirden geçer, CSRF yer tutucusuyla render edilen gövde saklanır.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not page_cache.is_enabled() or not page_cache.is_cacheable_request(request):
+            return self.get_response(request)
+        try:
+            options = getattr(resolve(request.path_info).func, 'page_cache', None)
+        except Resolver404:
+            options = None
+        if options is None:
+            return self.get_response(request)
+
+        keys_for_request, timeout = options
+        try:
+            keys, variant = keys_for_request(request)
+        except Http404:
+            # Hata yanıtını view üretsin
+            return self.get_response(request)
+        key = page_cache.page_cache_key(request, keys, variant)
+        entry = page_cache.get_entry(key)
+        if entry is not None:
+            return page_cache.finalize(entry, 'HIT')
+
+        request.page_cache_capture = True
+        response = self.get_response(request)
+        if hasattr(response, 'render') and callable(response.render) and not response.is_rendered:
+            response.render()
+        entry = page_cache.store(key, keys, response, timeout)
+        return page_cache.finalize(entry, 'MISS') if entry is not None else response
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:20
+
+import core.models
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_appointment_session_format_appointment_therapy_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_name', models.CharField(max_length=80)),
+                ('last_name', models.CharField(max_length=80)),
+                ('therapy_type', models.CharField(choices=[('cbt', 'Cognitive Behavioral Therapy'), ('couples', 'Couples Counseling'), ('mindfulness', 'Mindfulness Therapy')], default='cbt', max_length=20)),
+                ('session_format', models.CharField(choices=[('face_to_face', 'Face to Face Session'), ('online', 'Online Session')], default='face_to_face', max_length=20)),
+                ('window_start', models.DateTimeField()),
+                ('window_end', models.DateTimeField()),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('booked', 'Booked'), ('withdrawn', 'Withdrawn')], default='waiting', max_length=20)),
+                ('code', models.CharField(db_index=True, default=core.models.generate_cancel_code, max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'window_start', 'window_end', 'created_at'], name='core_waitlist_match_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SlotClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_datetime', models.DateTimeField(db_index=True)),
+                ('token', models.CharField(db_index=True, default=core.models.generate_cancel_code, max_length=50, unique=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='claims', to='core.waitlistentry')),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'constraints': [models.UniqueConstraint(fields=('entry', 'start_datetime'), name='core_slotclaim_entry_slot_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+from django.db import migrations
+
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE core_appointment_search USING fts5(
+        first_name, last_name,
+        content='core_appointment', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_ai AFTER INSERT ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(rowid, first_name, last_name)
+        VALUES (new.id, new.first_name, new.last_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_ad AFTER DELETE ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(core_appointment_search, rowid, first_name, last_name)
+        VALUES ('delete', old.id, old.first_name, old.last_name);
+    END
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_au AFTER UPDATE OF first_name, last_name ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(core_appointment_search, rowid, first_name, last_name)
+        VALUES ('delete', old.id, old.first_name, old.last_name);
+        INSERT INTO core_appointment_search(rowid, first_name, last_name)
+        VALUES (new.id, new.first_name, new.last_name);
+    END
+    """,
+    "INSERT INTO core_appointment_search(core_appointment_search) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_appointment_search_au",
+    "DROP TRIGGER IF EXISTS core_appointment_search_ad",
+    "DROP TRIGGER IF EXISTS core_appointment_search_ai",
+    "DROP TABLE IF EXISTS core_appointment_search",
+]
+
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS core_appointment_name_trgm
+    ON core_appointment USING gin ((first_name || ' ' || last_name) gin_trgm_ops)
+    """,
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS core_appointment_name_trgm",
+]
+
+def run(statements_by_vendor):
+    def apply(apps, schema_editor):
+        for sql in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return apply
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}),
+            run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+    ]
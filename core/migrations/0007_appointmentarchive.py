@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:23
+
+import core.models
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_appointment_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentArchive',
+            fields=[
+                ('first_name', models.CharField(max_length=80)),
+                ('last_name', models.CharField(max_length=80)),
+                ('start_datetime', models.DateTimeField(db_index=True, unique=True)),
+                ('therapy_type', models.CharField(choices=[('cbt', 'Cognitive Behavioral Therapy'), ('couples', 'Couples Counseling'), ('mindfulness', 'Mindfulness Therapy')], default='cbt', max_length=20)),
+                ('session_format', models.CharField(choices=[('face_to_face', 'Face to Face Session'), ('online', 'Online Session')], default='face_to_face', max_length=20)),
+                ('cancel_code', models.CharField(db_index=True, default=core.models.generate_cancel_code, max_length=50, unique=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+            ],
+            options={
+                'ordering': ['start_datetime'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_appointmentarchive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyUtilization',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('therapy_type', models.CharField(choices=[('cbt', 'Cognitive Behavioral Therapy'), ('couples', 'Couples Counseling'), ('mindfulness', 'Mindfulness Therapy')], max_length=20)),
+                ('session_format', models.CharField(choices=[('face_to_face', 'Face to Face Session'), ('online', 'Online Session')], max_length=20)),
+                ('booked', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['date', 'hour'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'hour', 'therapy_type', 'session_format'), name='core_dailyutilization_bucket_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 22:32
+
+import core.models
+import django.db.models.deletion
+from importlib import import_module
+from django.db import migrations, models
+
+search_index = import_module('core.migrations.0006_appointment_search_index')
+
+def create_default_location(apps, schema_editor):
+    Location = apps.get_model('core', 'Location')
+    Location.objects.get_or_create(
+        slug='istanbul',
+        defaults={'name': 'Istanbul', 'time_zone': 'Europe/Istanbul'},
+    )
+
+def assign_default_location(apps, schema_editor):
+    Location = apps.get_model('core', 'Location')
+    default = Location.objects.get(slug='istanbul')
+    for model_name in ('Appointment', 'AppointmentArchive', 'WaitlistEntry'):
+        apps.get_model('core', model_name).objects.filter(location__isnull=True).update(location=default)
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite'ta ALTER işlemleri core_appointment tablosunu yeniden oluşturur ve tetikleyiciler düşer
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in search_index.SQLITE_DROP[:3] + search_index.SQLITE_CREATE[1:]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_dailyutilization'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(unique=True)),
+                ('time_zone', models.CharField(default='Europe/Istanbul', max_length=64, validators=[core.models.validate_time_zone])),
+                ('slot_hours', models.JSONField(default=core.models.default_slot_hours)),
+                ('work_weekdays', models.JSONField(default=core.models.default_work_weekdays)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RunPython(create_default_location, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='waitlistentry',
+            name='core_waitlist_match_idx',
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='start_datetime',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='appointmentarchive',
+            name='start_datetime',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AddField(
+            model_name='appointmentarchive',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AddField(
+            model_name='waitlistentry',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='core.location'),
+        ),
+        migrations.RunPython(assign_default_location, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='appointment',
+            name='location',
+            field=models.ForeignKey(default=core.models.default_location, on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AlterField(
+            model_name='appointmentarchive',
+            name='location',
+            field=models.ForeignKey(default=core.models.default_location, on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='location',
+            field=models.ForeignKey(default=core.models.default_location, on_delete=django.db.models.deletion.CASCADE, to='core.location'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(fields=['status', 'location', 'window_start', 'window_end', 'created_at'], name='core_waitlist_loc_match_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(fields=('location', 'start_datetime'), name='core_appointment_location_slot_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointmentarchive',
+            constraint=models.UniqueConstraint(fields=('location', 'start_datetime'), name='core_appointmentarchive_location_slot_uniq'),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+from core.text import name_search_text
+
+search_index = import_module('core.migrations.0006_appointment_search_index')
+
+# Index artık ham isim yerine normalize edilmiş search_text kolonunu (core.text) kapsar
+SQLITE_CREATE = [
+    """
+    CREATE VIRTUAL TABLE core_appointment_search USING fts5(
+        search_text,
+        content='core_appointment', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_ai AFTER INSERT ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_ad AFTER DELETE ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(core_appointment_search, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER core_appointment_search_au AFTER UPDATE OF search_text ON core_appointment BEGIN
+        INSERT INTO core_appointment_search(core_appointment_search, rowid, search_text)
+        VALUES ('delete', old.id, old.search_text);
+        INSERT INTO core_appointment_search(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    "INSERT INTO core_appointment_search(core_appointment_search) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = search_index.SQLITE_DROP
+
+POSTGRES_CREATE = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    """
+    CREATE INDEX IF NOT EXISTS core_appointment_search_text_trgm
+    ON core_appointment USING gin (search_text gin_trgm_ops)
+    """,
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS core_appointment_search_text_trgm",
+]
+
+def restore_search_triggers(apps, schema_editor):
+    # SQLite'ta ALTER işlemleri core_appointment tablosunu yeniden oluşturur ve tetikleyiciler düşer
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in SQLITE_DROP[:3] + SQLITE_CREATE[1:]:
+        schema_editor.execute(sql)
+
+def fill_search_text(apps, schema_editor):
+    for model_name in ('Appointment', 'AppointmentArchive'):
+        model = apps.get_model('core', model_name)
+        rows = model.objects.only('first_name', 'last_name').iterator()
+        for row in rows:
+            model.objects.filter(pk=row.pk).update(search_text=name_search_text(row.first_name, row.last_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_locations'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            search_index.run({'sqlite': search_index.SQLITE_DROP, 'postgresql': search_index.POSTGRES_DROP}),
+            search_index.run({'sqlite': search_index.SQLITE_CREATE, 'postgresql': search_index.POSTGRES_CREATE}),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='search_text',
+            field=models.CharField(default='', editable=False, max_length=400),
+        ),
+        migrations.AddField(
+            model_name='appointmentarchive',
+            name='search_text',
+            field=models.CharField(default='', editable=False, max_length=400),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(
+            search_index.run({'sqlite': SQLITE_CREATE, 'postgresql': POSTGRES_CREATE}),
+            search_index.run({'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:00
+
+import django.db.models.deletion
+from importlib import import_module
+from django.db import migrations, models
+
+search_text = import_module('core.migrations.0010_appointment_search_text')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_appointment_search_text'),
+    ]
+
+    operations = [
+        # SQLite'ta AlterField core_appointment'ı yeniden oluşturur: arama tetikleyicileri her iki yönde de geri kurulur
+        migrations.RunPython(migrations.RunPython.noop, search_text.restore_search_triggers),
+        migrations.AlterField(
+            model_name='appointment',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AlterField(
+            model_name='appointmentarchive',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='core.location'),
+        ),
+        migrations.AlterField(
+            model_name='waitlistentry',
+            name='location',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.location'),
+        ),
+        migrations.RunPython(search_text.restore_search_triggers, migrations.RunPython.noop),
+    ]
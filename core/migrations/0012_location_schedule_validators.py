@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:13
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_location_no_default'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='location',
+            name='slot_hours',
+            field=models.JSONField(default=core.models.default_slot_hours, validators=[core.models.validate_slot_hours]),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='work_weekdays',
+            field=models.JSONField(default=core.models.default_work_weekdays, validators=[core.models.validate_work_weekdays]),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:14
+
+from importlib import import_module
+from django.db import migrations, models
+
+search_text = import_module('core.migrations.0010_appointment_search_text')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_location_schedule_validators'),
+    ]
+
+    operations = [
+        # SQLite'ta AlterField core_appointment'ı yeniden oluşturur: arama tetikleyicileri her iki yönde de geri kurulur
+        migrations.RunPython(migrations.RunPython.noop, search_text.restore_search_triggers),
+        migrations.AlterField(
+            model_name='appointment',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.AlterField(
+            model_name='appointmentarchive',
+            name='search_text',
+            field=models.TextField(default='', editable=False),
+        ),
+        migrations.RunPython(search_text.restore_search_triggers, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,65 @@
 import secrets
+from zoneinfo import ZoneInfo, available_timezones
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
+from .text import name_search_text
+
 def generate_cancel_code() -> str:
     return secrets.token_urlsafe(6)
 
-class Appointment(models.Model):
+def default_slot_hours():
+    return [9, 10, 11, 14, 15, 16]
+
+def default_work_weekdays():
+    return [0, 1, 2, 3, 4, 5]
+
+def validate_time_zone(value):
+    if value not in available_timezones():
+        raise ValidationError(f"Unknown time zone: {value}")
+
+def _validate_unique_ints(value, low, high, label):
+    # bool de int'tir; JSON'daki true/false kabul edilmez
+    if not isinstance(value, list) or any(type(v) is not int or not low <= v <= high for v in value):
+        raise ValidationError(f"{label} must be a list of integers from {low} to {high}.")
+    if len(set(value)) != len(value):
+        raise ValidationError(f"{label} must not contain duplicates.")
+
+def validate_slot_hours(value):
+    _validate_unique_ints(value, 0, 23, "Slot hours")
+
+def validate_work_weekdays(value):
+    _validate_unique_ints(value, 0, 6, "Work weekdays")
+
+class Location(models.Model):
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(unique=True)
+    time_zone = models.CharField(max_length=64, default='Europe/Istanbul', validators=[validate_time_zone])
+    # Yerel saat olarak slot başlangıçları ve çalışma günleri (0=Pazartesi)
+    slot_hours = models.JSONField(default=default_slot_hours, validators=[validate_slot_hours])
+    work_weekdays = models.JSONField(default=default_work_weekdays, validators=[validate_work_weekdays])
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    @property
+    def tz(self):
+        return ZoneInfo(self.time_zone)
+
+def default_location():
+    """
+    settings.DEFAULT_LOCATION slug'ına sahip lokasyonun id'si. Sadece 0009 migration'ı için
+    tutulur: modellerde varsayılan yoktur, lokasyon her kayıtta açıkça verilir (varsayılan
+    değer hesaplanırken DB'ye yazılmasın diye).
+    """
+    from .locations import get_default_location
+    return get_default_location().pk
+
+class BaseAppointment(models.Model):
     THERAPY_TYPE_CHOICES = [
         ('cbt', 'Cognitive Behavioral Therapy'),
         ('couples', 'Couples Counseling'),
@@ -19,7 +73,8 @@ class Appointment(models.Model):
 
     first_name = models.CharField(max_length=80)
     last_name = models.CharField(max_length=80)
-    start_datetime = models.DateTimeField(unique=True, db_index=True)
+    location = models.ForeignKey(Location, on_delete=models.PROTECT)
+    start_datetime = models.DateTimeField(db_index=True)
 
     therapy_type = models.CharField(
         max_length=20,
@@ -34,16 +89,128 @@ class Appointment(models.Model):
 
     cancel_code = models.CharField(max_length=50, unique=True, db_index=True, default=generate_cancel_code)
     created_at = models.DateTimeField(default=timezone.now, editable=False)
+    # İsim araması için normalize edilmiş metin (core.text); FTS/trigram index bu kolonu kullanır.
+    # Kelime başına hem ^kelime$ hem #iskelet# yazıldığından isim alanlarının toplamından uzundur.
+    search_text = models.TextField(default='', editable=False)
+
+    is_archived = False
 
     class Meta:
+        abstract = True
         ordering = ['start_datetime']
+        constraints = [
+            # Her lokasyonda bir saate tek randevu
+            models.UniqueConstraint(fields=['location', 'start_datetime'], name='%(app_label)s_%(class)s_location_slot_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.first_name} {self.last_name} @ {self.start_datetime}"
 
+    def save(self, *args, **kwargs):
+        self.search_text = name_search_text(self.first_name, self.last_name)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'first_name', 'last_name'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'search_text'}
+        super().save(*args, **kwargs)
+
     @property
     def display_name(self):
         """Show first name + last initial (e.g., Steven J.)"""
         if self.last_name:
             return f"{self.first_name} {self.last_name[0]}."
         return self.first_name
+
+class Appointment(BaseAppointment):
+    class Meta(BaseAppointment.Meta):
+        pass
+
+class AppointmentArchive(BaseAppointment):
+    """Past appointments moved out of the hot table by `archive_appointments`. Keeps the original id."""
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    is_archived = True
+
+    class Meta(BaseAppointment.Meta):
+        pass
+
+class WaitlistEntry(models.Model):
+    STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('booked', 'Booked'),
+        ('withdrawn', 'Withdrawn'),
+    ]
+
+    first_name = models.CharField(max_length=80)
+    last_name = models.CharField(max_length=80)
+    location = models.ForeignKey(Location, on_delete=models.CASCADE)
+
+    therapy_type = models.CharField(
+        max_length=20,
+        choices=Appointment.THERAPY_TYPE_CHOICES,
+        default='cbt',
+    )
+    session_format = models.CharField(
+        max_length=20,
+        choices=Appointment.SESSION_FORMAT_CHOICES,
+        default='face_to_face',
+    )
+
+    # Kabul edilebilir zaman aralığı: window_start <= slot < window_end
+    window_start = models.DateTimeField()
+    window_end = models.DateTimeField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='waiting')
+    code = models.CharField(max_length=50, unique=True, db_index=True, default=generate_cancel_code)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Backfill lookup: status + window range, oldest entries first
+            models.Index(fields=['status', 'location', 'window_start', 'window_end', 'created_at'], name='core_waitlist_loc_match_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.first_name} {self.last_name} waiting {self.window_start} - {self.window_end}"
+
+class SlotClaim(models.Model):
+    """A short-lived offer of a freed slot to one waitlist entry. First claim wins."""
+    entry = models.ForeignKey(WaitlistEntry, on_delete=models.CASCADE, related_name='claims')
+    start_datetime = models.DateTimeField(db_index=True)
+    token = models.CharField(max_length=50, unique=True, db_index=True, default=generate_cancel_code)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['entry', 'start_datetime'], name='core_slotclaim_entry_slot_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.entry} -> {self.start_datetime}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+class DailyUtilization(models.Model):
+    """Booked sessions per (day, hour, therapy type, session format); maintained incrementally by core.analytics."""
+    date = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    therapy_type = models.CharField(max_length=20, choices=Appointment.THERAPY_TYPE_CHOICES)
+    session_format = models.CharField(max_length=20, choices=Appointment.SESSION_FORMAT_CHOICES)
+    booked = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'hour']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'hour', 'therapy_type', 'session_format'],
+                name='core_dailyutilization_bucket_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.hour:02d}:00 {self.therapy_type}/{self.session_format}: {self.booked}"
@@ -0,0 +1,245 @@
+"""
+Paylaşımlı doluluk index'i (occupancy bitmap).
+
+Bir host'taki tüm worker'lar aynı dosyayı mmap ile açar; her (lokasyon, yerel gün, saat) için bir
+bit tutulur. Ufuk [base, base + OCCUPANCY_HORIZON_DAYS) günüdür ve `reconcile_occupancy` komutu
+ile DB'den yeniden kurulup ileri kaydırılır. Randevu kaydı/silinmesi ve bekleme listesi teklifinin
+açılması/süresinin dolması commit sonrasında ilgili biti değiştirir; `slots_for_day` ufuk içindeki günler için DB yerine bit okur. Ufuk dışı günler,
+index'e sığmayan lokasyonlar ya da kapalı index (OCCUPANCY_INDEX_PATH boş) için None döner ve
+çağıran DB'ye gider. Çift rezervasyon koruması yine DB unique constraint'indedir; index sadece
+takvim gösterimi içindir.
+
+Dosya düzeni: 32 baytlık başlık + lokasyon * gün başına 3 bayt (24 saat). Yazma ve reconcile
+`<yol>.lock` dosyasındaki `fcntl` kaydı kilidi (süreçler arası) + thread kilidi altında yapılır;
+okuma paylaşımlı kilitle. Düzen değişince dosya kesilmez, yenisiyle değiştirilir (os.replace).
+"""
+from contextlib import contextmanager, suppress
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: index kullanılamaz, her zaman DB'ye gidilir
+    fcntl = None
+
+from django.conf import settings
+from django.utils import timezone
+
+MAGIC = b'OCC1'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHIi')
+HEADER_SIZE = 32
+BYTES_PER_DAY = 3
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+class OccupancyIndex:
+    def __init__(self, path, horizon_days: int, max_locations: int):
+        self.path = str(path)
+        self.horizon_days = horizon_days
+        self.max_locations = max_locations
+        self.size = HEADER_SIZE + max_locations * horizon_days * BYTES_PER_DAY
+        self._thread_lock = threading.Lock()
+        # Veri dosyası değiştirilebildiği için süreçler arası kilit ayrı, sabit bir dosyada tutulur
+        self._lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        self._fd = self._map = self._ino = None
+        with self._locked(exclusive=True):
+            pass
+
+    def _layout_matches(self, fd) -> bool:
+        if os.fstat(fd).st_size != self.size:
+            return False
+        raw = os.pread(fd, HEADER.size, 0)
+        if len(raw) != HEADER.size:
+            return False
+        magic, version, max_locations, horizon_days, _ = HEADER.unpack(raw)
+        return (magic, version, max_locations, horizon_days) == (
+            MAGIC, FORMAT_VERSION, self.max_locations, self.horizon_days)
+
+    def _create_empty(self):
+        """
+        Yeni ya da farklı ayarlarla oluşturulmuş dosya: boş ve "reconcile edilmemiş" başlar. Diğer
+        worker'ların eşlediği dosya yerinde kesilmez (kısalan mmap'e erişim SIGBUS verir); yeni düzen
+        geçici dosyada kurulup os.replace ile yerine konur, eski worker'lar bir sonraki erişimde açar.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), prefix='.occupancy-')
+        try:
+            os.fchmod(fd, 0o644)
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, HEADER.pack(MAGIC, FORMAT_VERSION, self.max_locations, self.horizon_days, 0), 0)
+            os.fsync(fd)
+            os.close(fd)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            with suppress(OSError):
+                os.close(fd)
+            with suppress(OSError):
+                os.unlink(tmp_path)
+            raise
+
+    def _replaced(self) -> bool:
+        try:
+            return os.stat(self.path).st_ino != self._ino
+        except FileNotFoundError:
+            return True
+
+    def _open(self):
+        """Dosyayı (yeniden) açar ve eşler; yoksa ya da düzeni uymuyorsa boşuyla değiştirir. Özel kilit altında."""
+        if self._map is not None:
+            self._map.close()
+            os.close(self._fd)
+            self._fd = self._map = self._ino = None
+        try:
+            fd = os.open(self.path, os.O_RDWR)
+        except FileNotFoundError:
+            fd = None
+        if fd is not None and not self._layout_matches(fd):
+            os.close(fd)
+            fd = None
+        if fd is None:
+            self._create_empty()
+            fd = os.open(self.path, os.O_RDWR)
+        self._fd = fd
+        self._ino = os.fstat(fd).st_ino
+        self._map = mmap.mmap(fd, self.size)
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            fcntl.lockf(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if self._replaced():
+                    # Başka bir süreç dosyayı değiştirdi (ya da ilk açılış): özel kilitle yeniden eşlenir
+                    if not exclusive:
+                        fcntl.lockf(self._lock_fd, fcntl.LOCK_EX)
+                    self._open()
+                yield
+            finally:
+                fcntl.lockf(self._lock_fd, fcntl.LOCK_UN)
+
+    @property
+    def base(self):
+        """Ufkun ilk günü; hiç reconcile edilmediyse None."""
+        ordinal = HEADER.unpack_from(self._map, 0)[4]
+        return date.fromordinal(ordinal) if ordinal > 0 else None
+
+    def _offset(self, base_ordinal: int, location_id: int, d: date):
+        row = d.toordinal() - base_ordinal
+        if base_ordinal <= 0 or not 0 <= row < self.horizon_days:
+            return None
+        if not 0 <= location_id < self.max_locations:
+            return None
+        return HEADER_SIZE + (location_id * self.horizon_days + row) * BYTES_PER_DAY
+
+    def booked_hours(self, location_id: int, d: date):
+        """O yerel gündeki dolu saatler (frozenset) ya da gün ufuk dışındaysa None."""
+        with self._locked(exclusive=False):
+            offset = self._offset(HEADER.unpack_from(self._map, 0)[4], location_id, d)
+            if offset is None:
+                return None
+            word = int.from_bytes(self._map[offset:offset + BYTES_PER_DAY], 'little')
+        return frozenset(h for h in range(24) if word >> h & 1)
+
+    def mark(self, location_id: int, d: date, hour: int, booked: bool):
+        with self._locked(exclusive=True):
+            offset = self._offset(HEADER.unpack_from(self._map, 0)[4], location_id, d)
+            if offset is None:
+                return
+            word = int.from_bytes(self._map[offset:offset + BYTES_PER_DAY], 'little')
+            word = word | (1 << hour) if booked else word & ~(1 << hour)
+            self._map[offset:offset + BYTES_PER_DAY] = word.to_bytes(BYTES_PER_DAY, 'little')
+
+    def rebuild(self, base: date, load_booked) -> int:
+        """
+        Ufku `base`'ten başlayarak yeniden kurar; değişen bit sayısını döner. `load_booked(start, end)`
+        (lokasyon id, yerel gün, saat) üçlüleri verir ve kilit altında çağrılır: commit'i sorgudan
+        sonra gelen bir randevunun bit güncellemesi reconcile'ın yazmasını bekler, kaybolmaz.
+        """
+        end = base + timedelta(days=self.horizon_days)
+        fresh = bytearray(self.size - HEADER_SIZE)
+        with self._locked(exclusive=True):
+            for location_id, d, hour in load_booked(base, end):
+                offset = self._offset(base.toordinal(), location_id, d)
+                if offset is not None:
+                    fresh[offset - HEADER_SIZE + hour // 8] |= 1 << (hour % 8)
+            old_base = HEADER.unpack_from(self._map, 0)[4]
+            changed = None
+            if old_base == base.toordinal():
+                old = self._map[HEADER_SIZE:]
+                changed = sum(bin(a ^ b).count('1') for a, b in zip(old, fresh) if a != b)
+            self._map[HEADER_SIZE:] = bytes(fresh)
+            HEADER.pack_into(self._map, 0, MAGIC, FORMAT_VERSION, self.max_locations, self.horizon_days, base.toordinal())
+            self._map.flush()
+        return changed
+
+def get_index():
+    """Ayarlarda yol verilmişse bu süreçteki index (ilk çağrıda açılır), yoksa None."""
+    path = getattr(settings, 'OCCUPANCY_INDEX_PATH', None)
+    if not path or fcntl is None:
+        return None
+    key = (
+        str(path),
+        getattr(settings, 'OCCUPANCY_HORIZON_DAYS', 60),
+        getattr(settings, 'OCCUPANCY_MAX_LOCATIONS', 64),
+    )
+    index = _indexes.get(key)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None:
+                index = _indexes[key] = OccupancyIndex(*key)
+    return index
+
+def booked_hours(location, d: date):
+    index = get_index()
+    return index.booked_hours(location.pk, d) if index is not None else None
+
+def record(location, start_dt, booked: bool):
+    index = get_index()
+    if index is not None:
+        local = start_dt.astimezone(location.tz)
+        index.mark(location.pk, local.date(), local.hour, booked)
+
+def reconcile(base: date = None):
+    """Ufku DB'den yeniden kurar (varsayılan: dünden başlayarak); (base, değişen bit) ya da index kapalıysa None."""
+    from .locations import all_locations
+    from .models import Appointment, SlotClaim
+
+    index = get_index()
+    if index is None:
+        return None
+    locations = all_locations()
+    if base is None:
+        today = min((timezone.now().astimezone(loc.tz).date() for loc in locations), default=timezone.now().date())
+        base = today - timedelta(days=1)
+
+    def load_booked(start: date, end: date):
+        by_id = {loc.pk: loc for loc in locations}
+        # Yerel günler UTC'ye göre en fazla bir gün kayar; pay bırakılıp yerel güne göre ayrılır
+        since = datetime.combine(start - timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+        until = datetime.combine(end + timedelta(days=1), time.min, tzinfo=dt_timezone.utc)
+        rows = (
+            Appointment.objects
+            .filter(start_datetime__gte=since, start_datetime__lt=until)
+            .values_list('location_id', 'start_datetime')
+            .order_by()
+            # Süresi dolmamış bekleme listesi teklifleri de slotu tutar
+            .union(
+                SlotClaim.objects
+                .filter(start_datetime__gte=since, start_datetime__lt=until, expires_at__gt=timezone.now())
+                .values_list('entry__location_id', 'start_datetime')
+                .order_by()
+            )
+        )
+        for location_id, start_dt in rows.iterator():
+            location = by_id.get(location_id)
+            if location is not None:
+                local = start_dt.astimezone(location.tz)
+                yield location_id, local.date(), local.hour
+
+    return base, index.rebuild(base, load_booked)
@@ -0,0 +1,89 @@
+"""
+Anonim GET istekleri için tam yanıt önbelleği.
+
+Arama `core.middleware.PageCacheMiddleware` içinde, SessionMiddleware'den önce yapılır: isabet eden
+istek session/auth/mesaj katmanlarına hiç girmez. Sayfa CSRF token'ı yerine sabit bir yer tutucu ile
+render edilir ve gövde herkes için aynıdır; token'ı `csrf_token` endpoint'inden sayfadaki script
+doldurur. Önbellek anahtarı yol + sayfanın surrogate key'lerinin nesil numaralarından oluşur, bu
+yüzden `surrogate.purge` ile ilgili tüm sayfalar geçersiz olur.
+
+`pages` önbelleği DummyCache ise middleware devre dışıdır: yer tutucu ve başlık değişikliği yok.
+Proxy'ler (CDN) sayfayı ancak PAGE_CACHE_PURGE_HOOK tanımlıysa `s-maxage` ile saklayabilir; hook
+randevu değişince commit sonrası çağrılır. Hook yoksa yanıt `private, no-cache` gider.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.http import HttpResponse
+
+from . import surrogate
+
+CSRF_PLACEHOLDER = 'csrf-token-placeholder-7f3c1e'
+PAGE_KEY = 'pagecache:{}'
+# settings.CACHES: CACHE_URL ile paylaşımlı önbellek yoksa DummyCache (önbellek kapalı)
+CACHE_ALIAS = 'pages'
+DEFAULT_TIMEOUT = 60 * 10
+
+# Önbellekteki yanıtla birlikte saklanmayan başlıklar; isabette yeniden üretilir
+UNCACHED_HEADERS = {'cache-control', 'content-length', 'expires', 'vary'}
+
+def is_enabled() -> bool:
+    return not isinstance(caches[CACHE_ALIAS], DummyCache)
+
+def is_cacheable_request(request) -> bool:
+    """
+    Session yüklenmeden karar verilir: oturum çerezi (giriş yapmış personel, bekleyen kod) ya da
+    flash mesajı çerezi taşıyan istekler kişisel içerik görür ve önbelleği atlar.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return not any(name in request.COOKIES for name in (settings.SESSION_COOKIE_NAME, CookieStorage.cookie_name))
+
+def page_cache_key(request, keys, variant) -> str:
+    gens = surrogate.versions(keys)
+    raw = '|'.join([request.get_full_path(), variant] + [f"{k}={gens[k]}" for k in sorted(keys)])
+    return PAGE_KEY.format(hashlib.sha256(raw.encode()).hexdigest())
+
+def get_entry(key):
+    return caches[CACHE_ALIAS].get(key)
+
+def store(key, keys, response, timeout):
+    """Render edilmiş yanıtı saklar; saklanamıyorsa (hata, stream, çerez) None döner."""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return None
+    entry = {
+        'content': response.content,
+        'headers': [(k, v) for k, v in response.items() if k.lower() not in UNCACHED_HEADERS],
+        'keys': list(keys),
+        'timeout': timeout,
+    }
+    caches[CACHE_ALIAS].set(key, entry, timeout)
+    return entry
+
+def finalize(entry, status):
+    response = HttpResponse(entry['content'])
+    for header, value in entry['headers']:
+        response[header] = value
+    response['Surrogate-Key'] = ' '.join(entry['keys'])
+    response['X-Page-Cache'] = status
+    if surrogate.proxy_purge_enabled():
+        # Gövde kişisel veri (CSRF token dahil) içermez; proxy kopyası purge hook'uyla düşürülür
+        response['Cache-Control'] = f"public, max-age=0, s-maxage={entry['timeout']}"
+    else:
+        # Proxy'deki kopya purge edilemez: sadece uygulama içi önbellek saklar
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+def cache_public_page(keys_for_request, timeout=DEFAULT_TIMEOUT):
+    """
+    View'ı PageCacheMiddleware için işaretler. `keys_for_request(request)` -> (surrogate key
+    listesi, varyant metni); varyant, nesil numarasıyla ifade edilemeyen farkları (ör. geçmişte
+    kalan slot sayısı) taşır.
+    """
+    def decorator(view):
+        view.page_cache = (keys_for_request, timeout)
+        return view
+    return decorator
@@ -0,0 +1,115 @@
+"""
+Danışan adı araması.
+
+Index'lenen metin `search_text` kolonudur (core.text: aksansız, küçük harf, kelime sınırları ve
+sessiz harf iskeletleri). SQLite'ta `core_appointment_search` FTS5 (trigram tokenizer) tablosu,
+Postgres'te pg_trgm GIN index'i kullanılır; ikisi de 0010 migration'ı ile kurulur. Aday satırlar
+her zaman index'ten gelir: 3+ harfli kelimeler trigram ve iskelet eşleşmesiyle (Kya -> Kaya),
+daha kısa kelimeler `^` ile işaretli kelime başı önekiyle. Son sıralama trigram benzerliği ile yapılır.
+"""
+from django.db import connection
+from django.db.models import Q
+
+from .models import Appointment
+from .text import skeleton, words
+
+FTS_TABLE = 'core_appointment_search'
+# Index'ten okunan en az aday sayısı; sonuç limiti daha büyükse (admin) o kadar aday okunur
+CANDIDATE_LIMIT = 200
+MIN_SIMILARITY = 0.3
+# Önek ya da benzerlik tutmasa da sessiz harf iskeleti aynıysa (Smth -> Smith)
+SKELETON_SCORE = 0.75
+
+def tokenize(text: str):
+    return words(text)
+
+def trigrams(word: str, padded: bool = True):
+    """pg_trgm ile aynı kural: kelime başına iki, sonuna bir boşluk eklenir."""
+    if padded:
+        word = f"  {word} "
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+def similarity(a: str, b: str) -> float:
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+def token_score(token: str, words) -> float:
+    best = 0.0
+    for word in words:
+        if word.startswith(token):
+            return 1.0
+        best = max(best, similarity(token, word))
+        if len(token) >= 3 and skeleton(token) == skeleton(word):
+            best = max(best, SKELETON_SCORE)
+    return best
+
+def rank(query_tokens, appointments):
+    """Her sorgu kelimesi isimdeki bir kelimeye önek ya da yeterli benzerlikle uymalı."""
+    ranked = []
+    for appt in appointments:
+        words = tokenize(f"{appt.first_name} {appt.last_name}")
+        scores = [token_score(t, words) for t in query_tokens]
+        if scores and min(scores) >= MIN_SIMILARITY:
+            ranked.append((sum(scores) / len(scores), appt))
+    ranked.sort(key=lambda pair: (-pair[0], pair[1].pk))
+    return [appt for _, appt in ranked]
+
+def _quote(phrase: str) -> str:
+    return '"%s"' % phrase.replace('"', '""')
+
+def fts_query(tokens) -> str:
+    """Kelime başına: kısaysa ` ^ön` öneki, değilse trigram'lar ve `#iskelet#`; hepsi OR."""
+    terms = set()
+    for t in tokens:
+        if len(t) < 3:
+            terms.add(f" ^{t}")
+        else:
+            terms.update(trigrams(t, padded=False))
+            terms.add(f"#{skeleton(t)}#")
+    return ' OR '.join(_quote(term) for term in sorted(terms))
+
+def _sqlite_candidate_ids(tokens, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s",
+            [fts_query(tokens), limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def _postgres_candidate_ids(tokens, limit):
+    term = ' '.join(tokens)
+    patterns = [f"% ^{t}%" for t in tokens] + [f"% #{skeleton(t)}#%" for t in tokens if len(t) >= 3]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT id FROM core_appointment "
+            "WHERE %s <%% search_text OR search_text LIKE ANY(%s) "
+            "ORDER BY word_similarity(%s, search_text) DESC LIMIT %s",
+            [term, patterns, term, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def candidate_ids(tokens, limit):
+    if connection.vendor == 'sqlite':
+        return _sqlite_candidate_ids(tokens, limit)
+    if connection.vendor == 'postgresql':
+        return _postgres_candidate_ids(tokens, limit)
+    return None
+
+def search_appointments(query: str, limit: int = 20):
+    """İsme göre önek ve yazım hatası toleranslı arama; en iyi eşleşmeler önce."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    candidate_limit = max(CANDIDATE_LIMIT, limit)
+    ids = candidate_ids(tokens, candidate_limit)
+    if ids is None:
+        # Index'i olmayan backend: normalize edilmiş metinde kelime başı öneki
+        prefix = Q()
+        for t in tokens:
+            prefix &= Q(search_text__contains=f" ^{t}")
+        candidates = Appointment.objects.filter(prefix)[:candidate_limit]
+    else:
+        candidates = Appointment.objects.filter(pk__in=ids)
+    return rank(tokens, candidates)[:limit]
@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import occupancy, surrogate
+from .availability import bump_day, bump_location, day_key, day_of, location_key
+from .locations import invalidate_locations, locations_by_id
+from .models import Appointment, Location
+
+def invalidate_day(location_id, start_dt):
+    location = locations_by_id().get(location_id)
+    if location is None:
+        return
+    d = day_of(start_dt, location.tz)
+    # Hemen ve commit sonrası: commit öncesi eski veriyle önbelleğe yazılan fragment da geçersiz olur
+    bump_day(location_id, d)
+
+    def after_commit():
+        bump_day(location_id, d)
+        surrogate.purge_proxy(day_key(location_id, d))
+    transaction.on_commit(after_commit)
+
+def update_occupancy(location_id, start_dt, booked: bool):
+    # Sadece commit olursa; geri alınan işlem bit bırakmaz
+    location = locations_by_id().get(location_id)
+    if location is not None:
+        transaction.on_commit(lambda: occupancy.record(location, start_dt, booked))
+
+@receiver(pre_save, sender=Appointment)
+def appointment_moving(sender, instance, **kwargs):
+    if instance._state.adding or instance.pk is None:
+        return
+    old = Appointment.objects.filter(pk=instance.pk).values_list('location_id', 'start_datetime').first()
+    if old is not None and old != (instance.location_id, instance.start_datetime):
+        invalidate_day(*old)
+        update_occupancy(*old, booked=False)
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, **kwargs):
+    invalidate_day(instance.location_id, instance.start_datetime)
+    update_occupancy(instance.location_id, instance.start_datetime, booked=True)
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    invalidate_day(instance.location_id, instance.start_datetime)
+    update_occupancy(instance.location_id, instance.start_datetime, booked=False)
+
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def location_changed(sender, instance, **kwargs):
+    invalidate_locations()
+    bump_location(instance.pk)
+    transaction.on_commit(invalidate_locations)
+    transaction.on_commit(lambda: surrogate.purge_proxy(location_key(instance.pk)))
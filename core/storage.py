@@ -0,0 +1,44 @@
+"""
+collectstatic sırasında hash'li dosya adları + önceden sıkıştırılmış (.gz / .br) kopyalar.
+Sıkıştırılmış dosyalar core.middleware.StaticAssetMiddleware tarafından servis edilir.
+"""
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:  # brotli opsiyonel; yoksa sadece gzip üretilir
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico')
+MIN_COMPRESS_SIZE = 256
+
+def compressed_variants(data: bytes):
+    """(uzantı, içerik) çiftleri; sadece orijinalden küçük olanlar."""
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    return [(ext, body) for ext, body in variants if len(body) < len(data)]
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(paths)
+        names.update(self.hashed_files.get(self.hash_key(self.clean_name(name)), name) for name in paths)
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE_EXTENSIONS) and self.exists(name):
+                self.compress(name)
+
+    def compress(self, name):
+        with self.open(name) as f:
+            data = f.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        for ext, body in compressed_variants(data):
+            if self.exists(name + ext):
+                self.delete(name + ext)
+            self._save(name + ext, ContentFile(body))
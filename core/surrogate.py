@@ -0,0 +1,50 @@
+"""
+Surrogate key'ler: önbelleğe alınan her yanıt/fragment bir veya daha fazla anahtarla etiketlenir
+(ör. `day:2025-03-04`, `page:home`). Her anahtarın önbellekte bir "nesil" numarası vardır;
+`purge` numarayı artırır ve o anahtarı içeren tüm kayıtlar bir sonraki okumada ıska geçer.
+Uygulamanın önündeki CDN/proxy'nin kopyaları `purge_proxy` ile (PAGE_CACHE_PURGE_HOOK) düşürülür.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'surrogate:v:{}'
+
+def _initial_version() -> int:
+    # Anahtar önbellekten düşerse eski kayıtlarla çakışmasın diye zamana bağlı başlar
+    return time.time_ns()
+
+def versions(keys) -> dict:
+    """{key: version}; tek get_many ile okunur, eksik olanlar başlatılır."""
+    cache_keys = {VERSION_KEY.format(k): k for k in keys}
+    found = cache.get_many(cache_keys)
+    result = {cache_keys[ck]: v for ck, v in found.items()}
+    for ck, key in cache_keys.items():
+        if key not in result:
+            cache.add(ck, _initial_version(), timeout=None)
+            result[key] = cache.get(ck)
+    return result
+
+def purge(*keys):
+    for key in keys:
+        try:
+            cache.incr(VERSION_KEY.format(key))
+        except ValueError:
+            cache.set(VERSION_KEY.format(key), _initial_version(), timeout=None)
+
+def proxy_purge_enabled() -> bool:
+    return bool(getattr(settings, 'PAGE_CACHE_PURGE_HOOK', None))
+
+def purge_proxy(*keys):
+    """Anahtarları proxy'den düşürür; hook yoksa bir şey yapmaz. Hata commit'i etkilemez, loglanır."""
+    if not proxy_purge_enabled():
+        return
+    try:
+        import_string(settings.PAGE_CACHE_PURGE_HOOK)(list(keys))
+    except Exception:
+        logger.exception("Proxy purge failed for %s", ' '.join(keys))
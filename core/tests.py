@@ -1,14 +1,32 @@
 from __future__ import annotations
 from datetime import datetime, date, timedelta
+from pathlib import Path
 from zoneinfo import ZoneInfo
+from io import StringIO
 from unittest.mock import patch
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
-from .models import Appointment
+from .availability import day_key
+from .locations import get_default_location
+from .models import Appointment, AppointmentArchive, DailyUtilization, Location, SlotClaim, WaitlistEntry
+from .waitlist import accept_claim
 
 TR_TZ = ZoneInfo("Europe/Istanbul")
 
+# CACHE_URL ile paylaşımlı önbellek varmış gibi: tüm alias'lar aynı LocMem deposunu kullanır
+SHARED_CACHES = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shared-test-cache"}
+    for alias in ("default", "pages", "fragments")
+}
+
+# PAGE_CACHE_PURGE_HOOK olarak verilir: CDN purge çağrılarını kaydeder
+PROXY_PURGES = []
+
+def record_proxy_purge(keys):
+    PROXY_PURGES.append(keys)
+
 def iso_in_tz(dt: datetime) -> str:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=TR_TZ)
@@ -20,6 +38,9 @@ class TherapyAppointmentTests(TestCase):
         cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
         cls.client = Client()
 
+    def setUp(self):
+        cache.clear()
+
     def _next_weekday(self, weekday: int, base: date | None = None) -> date:
         if base is None:
             base = self.FIXED_NOW.date()
@@ -28,6 +49,7 @@ class TherapyAppointmentTests(TestCase):
 
     def test_model_display_name(self):
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Ada",
             last_name="Lovelace",
             start_datetime=self.FIXED_NOW + timedelta(days=1),
@@ -37,6 +59,7 @@ class TherapyAppointmentTests(TestCase):
         self.assertEqual(appt.display_name, "Ada L.")
 
         appt2 = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Grace",
             last_name="",
             start_datetime=self.FIXED_NOW + timedelta(days=2),
@@ -48,6 +71,7 @@ class TherapyAppointmentTests(TestCase):
     def test_unique_start_datetime_enforced(self):
         start_dt = self.FIXED_NOW + timedelta(days=1, hours=1)
         Appointment.objects.create(
+            location=get_default_location(),
             first_name="A",
             last_name="B",
             start_datetime=start_dt,
@@ -56,6 +80,7 @@ class TherapyAppointmentTests(TestCase):
         )
         with self.assertRaises(Exception):
             Appointment.objects.create(
+                location=get_default_location(),
                 first_name="X",
                 last_name="Y",
                 start_datetime=start_dt,
@@ -95,6 +120,7 @@ class TherapyAppointmentTests(TestCase):
         slots_tomorrow = generate_candidate_slot_datetimes(tomorrow)
         booked = slots_tomorrow[0]
         Appointment.objects.create(
+            location=get_default_location(),
             first_name="Book",
             last_name="Ed",
             start_datetime=booked,
@@ -119,6 +145,7 @@ class TherapyAppointmentTests(TestCase):
 
         future_dt = generate_candidate_slot_datetimes(today)[-1]
         Appointment.objects.create(
+            location=get_default_location(),
             first_name="Taken",
             last_name="Slot",
             start_datetime=future_dt,
@@ -227,6 +254,7 @@ class TherapyAppointmentTests(TestCase):
         day = self.FIXED_NOW.date() + timedelta(days=1)
         slot = datetime(day.year, day.month, day.day, 14, tzinfo=TR_TZ)
         Appointment.objects.create(
+            location=get_default_location(),
             first_name="First",
             last_name="User",
             start_datetime=slot,
@@ -249,6 +277,7 @@ class TherapyAppointmentTests(TestCase):
         mock_now.return_value = self.FIXED_NOW
         start_dt = self.FIXED_NOW + timedelta(days=1, hours=1)
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Jane",
             last_name="Doe",
             start_datetime=start_dt,
@@ -273,6 +302,7 @@ class TherapyAppointmentTests(TestCase):
         mock_now.return_value = self.FIXED_NOW
         start_dt = self.FIXED_NOW + timedelta(days=3, hours=2)
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Ali",
             last_name="Veli",
             start_datetime=start_dt,
@@ -298,6 +328,7 @@ class TherapyAppointmentTests(TestCase):
     def test_cancel_check_api(self):
         start_dt = timezone.now() + timedelta(days=1)
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="X",
             last_name="Y",
             start_datetime=start_dt,
@@ -315,6 +346,7 @@ class TherapyAppointmentTests(TestCase):
         mock_now.return_value = self.FIXED_NOW
         start_dt = self.FIXED_NOW + timedelta(days=2)
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Will",
             last_name="Err",
             start_datetime=start_dt,
@@ -333,6 +365,7 @@ class TherapyAppointmentTests(TestCase):
         mock_now.return_value = self.FIXED_NOW
         start_dt = self.FIXED_NOW + timedelta(days=2)
         appt = Appointment.objects.create(
+            location=get_default_location(),
             first_name="Can",
             last_name="Sil",
             start_datetime=start_dt,
@@ -348,3 +381,1074 @@ class TherapyAppointmentTests(TestCase):
         self.assertFalse(Appointment.objects.filter(id=appt.id).exists())
         set_cookie_headers = [c for c in resp.cookies.values() if c.key == "appointment_code"]
         self.assertTrue(set_cookie_headers and set_cookie_headers[0]["max-age"] == 0)
+
+
+@override_settings(WAITLIST_BACKFILL_ASYNC=False)
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        day = cls.FIXED_NOW.date() + timedelta(days=1)
+        cls.slot = datetime(day.year, day.month, day.day, 14, tzinfo=TR_TZ)
+
+    def _entry(self, first_name, **kwargs):
+        kwargs.setdefault("window_start", self.slot.replace(hour=0))
+        kwargs.setdefault("window_end", self.slot.replace(hour=0) + timedelta(days=1))
+        kwargs.setdefault("location", get_default_location())
+        return WaitlistEntry.objects.create(first_name=first_name, last_name="W", **kwargs)
+
+    @patch("core.views.ist_now")
+    def test_join_creates_entry_for_slot_window(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        resp = self.client.post(reverse("waitlist"), {
+            "first_name": "Wait",
+            "last_name": "Er",
+            "day": self.slot.date().isoformat(),
+            "hour": "14",
+            "therapy_type": "couples",
+            "session_format": "online",
+        })
+        entry = WaitlistEntry.objects.get()
+        self.assertRedirects(resp, reverse("waitlist_status", kwargs={"code": entry.code}))
+        self.assertEqual(entry.window_start, self.slot)
+        self.assertEqual(entry.window_end, self.slot + timedelta(hours=1))
+
+    @patch("core.waitlist.timezone.now")
+    @patch("core.views.ist_now")
+    def test_cancel_offers_slot_to_oldest_matching_entries(self, mock_now, mock_tz_now):
+        mock_now.return_value = self.FIXED_NOW
+        mock_tz_now.return_value = self.FIXED_NOW
+        first = self._entry("First")
+        second = self._entry("Second")
+        other_day = self._entry(
+            "Other",
+            window_start=self.slot + timedelta(days=1),
+            window_end=self.slot + timedelta(days=1, hours=1),
+        )
+        appt = Appointment.objects.create(
+            location=get_default_location(),
+            first_name="Busy", last_name="B", start_datetime=self.slot,
+            therapy_type="cbt", session_format="online",
+        )
+
+        with self.settings(WAITLIST_OFFER_SIZE=1):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("cancel", kwargs={"code": appt.cancel_code}),
+                                 {"confirm_code": appt.cancel_code})
+
+        claims = list(SlotClaim.objects.all())
+        self.assertEqual([c.entry_id for c in claims], [first.id])
+        self.assertEqual(claims[0].start_datetime, self.slot)
+        self.assertFalse(SlotClaim.objects.filter(entry__in=[second, other_day]).exists())
+
+    @patch("core.waitlist.connections")
+    @patch("core.waitlist._get_executor")
+    @patch("core.waitlist.timezone.now")
+    @patch("core.views.ist_now")
+    def test_cancel_runs_backfill_on_executor_when_async(self, mock_now, mock_tz_now, mock_executor, mock_connections):
+        mock_now.return_value = self.FIXED_NOW
+        mock_tz_now.return_value = self.FIXED_NOW
+        entry = self._entry("Async")
+        appt = Appointment.objects.create(
+            location=get_default_location(),
+            first_name="Busy", last_name="B", start_datetime=self.slot,
+            therapy_type="cbt", session_format="online",
+        )
+
+        with self.settings(WAITLIST_BACKFILL_ASYNC=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(reverse("cancel", kwargs={"code": appt.cancel_code}),
+                                 {"confirm_code": appt.cancel_code})
+
+        # İstek içinde eşleştirme yapılmaz; iş executor'a bırakılır
+        self.assertFalse(SlotClaim.objects.exists())
+        fn, *args = mock_executor.return_value.submit.call_args.args
+        self.assertEqual(fn.__name__, "_run_offer")
+        self.assertEqual(args, [get_default_location().id, self.slot])
+
+        fn(*args)
+        self.assertEqual(list(entry.claims.values_list("start_datetime", flat=True)), [self.slot])
+        mock_connections.close_all.assert_called_once_with()
+
+    @patch("core.waitlist.timezone.now")
+    @patch("core.views.ist_now")
+    def test_claim_books_slot_and_clears_competing_offers(self, mock_now, mock_tz_now):
+        mock_now.return_value = self.FIXED_NOW
+        mock_tz_now.return_value = self.FIXED_NOW
+        a = self._entry("A", therapy_type="mindfulness")
+        b = self._entry("B")
+        expires = timezone.now() + timedelta(minutes=15)
+        claim_a = SlotClaim.objects.create(entry=a, start_datetime=self.slot, expires_at=expires)
+        claim_b = SlotClaim.objects.create(entry=b, start_datetime=self.slot, expires_at=expires)
+
+        resp = self.client.post(reverse("claim_slot", kwargs={"token": claim_a.token}))
+        appt = Appointment.objects.get(start_datetime=self.slot)
+        self.assertRedirects(resp, reverse("confirm", kwargs={"code": appt.cancel_code}))
+        self.assertEqual(appt.therapy_type, "mindfulness")
+        a.refresh_from_db()
+        self.assertEqual(a.status, "booked")
+        self.assertFalse(SlotClaim.objects.filter(pk=claim_b.pk).exists())
+
+    def test_expired_claim_is_rejected(self):
+        entry = self._entry("Late")
+        claim = SlotClaim.objects.create(
+            entry=entry, start_datetime=self.slot, expires_at=timezone.now() - timedelta(minutes=1),
+        )
+        resp = self.client.post(reverse("claim_slot", kwargs={"token": claim.token}), follow=True)
+        msgs = list(resp.context["messages"])
+        self.assertTrue(any("expired" in str(m) for m in msgs))
+        self.assertFalse(Appointment.objects.filter(start_datetime=self.slot).exists())
+
+    @patch("core.waitlist.timezone.now")
+    def test_claim_for_started_slot_is_rejected(self, mock_tz_now):
+        # Teklif hâlâ geçerli ama slot başladı
+        mock_tz_now.return_value = self.slot + timedelta(minutes=5)
+        claim = SlotClaim.objects.create(
+            entry=self._entry("Late"), start_datetime=self.slot, expires_at=self.slot + timedelta(minutes=10),
+        )
+        resp = self.client.post(reverse("claim_slot", kwargs={"token": claim.token}), follow=True)
+        self.assertContains(resp, "This time is no longer available.")
+        self.assertIsNone(accept_claim(claim))
+        self.assertFalse(Appointment.objects.filter(start_datetime=self.slot).exists())
+
+    @patch("core.waitlist.timezone.now")
+    def test_reoffer_command_offers_free_slots_when_backfill_was_lost(self, mock_tz_now):
+        from django.core.management import call_command
+
+        mock_tz_now.return_value = self.FIXED_NOW
+        entry = self._entry("Lost", window_start=self.slot, window_end=self.slot + timedelta(hours=2))
+        Appointment.objects.create(
+            location=get_default_location(),
+            first_name="Busy", last_name="B", start_datetime=self.slot + timedelta(hours=1),
+            therapy_type="cbt", session_format="online",
+        )
+        # İptal sonrası arka plan işi hiç çalışmadı: slot boş, claim yok
+        call_command("reoffer_waitlist", stdout=StringIO())
+        self.assertEqual(list(entry.claims.values_list("start_datetime", flat=True)), [self.slot])
+
+    @patch("core.views.ist_now")
+    def test_unexpired_claim_holds_slot(self, mock_now):
+        from core.views import slots_for_day
+
+        mock_now.return_value = self.FIXED_NOW
+        SlotClaim.objects.create(
+            entry=self._entry("Held"), start_datetime=self.slot, expires_at=timezone.now() + timedelta(minutes=15),
+        )
+        by_hour = {s["dt"].hour: s["available"] for s in slots_for_day(self.slot.date())}
+        self.assertFalse(by_hour[14])
+        self.assertTrue(by_hour[15])
+
+        resp = self.client.post(reverse("book"), {
+            "first_name": "Walk",
+            "last_name": "In",
+            "ui_therapy_type": "cbt",
+            "ui_format": "online",
+            "start": iso_in_tz(self.slot),
+        }, follow=True)
+        self.assertContains(resp, "This time is no longer available.")
+        self.assertFalse(Appointment.objects.filter(start_datetime=self.slot).exists())
+
+    @patch("core.waitlist.invalidate_day")
+    @patch("core.waitlist.timezone.now")
+    def test_expired_claim_without_candidates_releases_slot(self, mock_tz_now, mock_invalidate):
+        from django.core.management import call_command
+
+        mock_tz_now.return_value = self.FIXED_NOW
+        SlotClaim.objects.create(
+            entry=self._entry("Gone", status="withdrawn"), start_datetime=self.slot,
+            expires_at=self.FIXED_NOW - timedelta(minutes=1),
+        )
+        call_command("reoffer_waitlist", stdout=StringIO())
+        mock_invalidate.assert_called_once_with(get_default_location().id, self.slot)
+
+
+class AppointmentAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from django.contrib.auth.models import User
+
+        cls.admin_user = User.objects.create_superuser("staff", "staff@example.com", "pw")
+        base = datetime(2025, 3, 3, 9, 0, tzinfo=TR_TZ)
+        cls.appts = [
+            Appointment.objects.create(
+                location=get_default_location(),
+                first_name=f"Client{i}",
+                last_name="Admin",
+                start_datetime=base + timedelta(days=i),
+                therapy_type="cbt",
+                session_format="online",
+            )
+            for i in range(5)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+        self.url = reverse("admin:core_appointment_changelist")
+
+    @patch("core.admin.AppointmentAdmin.list_per_page", 2)
+    def test_changelist_keyset_pagination(self):
+        newest_first = [a.id for a in reversed(self.appts)]
+
+        resp = self.client.get(self.url)
+        cl = resp.context["cl"]
+        self.assertEqual([a.id for a in cl.result_list], newest_first[:2])
+        self.assertIsNone(cl.prev_page_url)
+
+        resp = self.client.get(self.url + cl.next_page_url)
+        cl = resp.context["cl"]
+        self.assertEqual([a.id for a in cl.result_list], newest_first[2:4])
+
+        resp = self.client.get(self.url + cl.next_page_url)
+        cl = resp.context["cl"]
+        self.assertEqual([a.id for a in cl.result_list], newest_first[4:])
+        self.assertIsNone(cl.next_page_url)
+
+        resp = self.client.get(self.url + cl.prev_page_url)
+        self.assertEqual([a.id for a in resp.context["cl"].result_list], newest_first[2:4])
+
+    def test_search_by_cancel_code_is_exact(self):
+        target = self.appts[2]
+        resp = self.client.get(self.url, {"q": target.cancel_code})
+        self.assertEqual([a.id for a in resp.context["cl"].result_list], [target.id])
+
+    def test_date_hierarchy_drilldown(self):
+        resp = self.client.get(self.url, {"start_datetime__year": "2025", "start_datetime__month": "3", "start_datetime__day": "4"})
+        self.assertEqual([a.id for a in resp.context["cl"].result_list], [self.appts[1].id])
+
+    @patch("core.admin.AppointmentAdmin.list_per_page", 2)
+    def test_date_drilldown_counts_filtered_rows(self):
+        Appointment.objects.create(
+            location=get_default_location(),
+            first_name="April", last_name="Admin", start_datetime=datetime(2025, 4, 2, 9, tzinfo=TR_TZ),
+            therapy_type="cbt", session_format="online",
+        )
+        resp = self.client.get(self.url, {"start_datetime__year": "2025", "start_datetime__month": "3"})
+        cl = resp.context["cl"]
+        self.assertEqual(cl.result_count, 5)
+        self.assertEqual(cl.result_count_display, "5")
+
+
+class ClientSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        base = datetime(2025, 3, 3, 9, 0, tzinfo=TR_TZ)
+        names = [("Ada", "Lovelace"), ("Grace", "Hopper"), ("Alan", "Turing"), ("Adam", "Smith"),
+                 ("Elif", "Kaya"), ("Şule", "Öztürk")]
+        cls.appts = {
+            last: Appointment.objects.create(
+                location=get_default_location(),
+                first_name=first,
+                last_name=last,
+                start_datetime=base + timedelta(days=i),
+                therapy_type="cbt",
+                session_format="online",
+            )
+            for i, (first, last) in enumerate(names)
+        }
+
+    def _names(self, query):
+        from core.search import search_appointments
+
+        return [a.last_name for a in search_appointments(query)]
+
+    def test_prefix_query(self):
+        self.assertEqual(self._names("love"), ["Lovelace"])
+        self.assertEqual(sorted(self._names("ada")), ["Lovelace", "Smith"])
+
+    def test_typo_tolerant_query(self):
+        self.assertEqual(self._names("lovlace"), ["Lovelace"])
+        self.assertEqual(self._names("grace hoper"), ["Hopper"])
+
+    def test_diacritics_are_ignored(self):
+        self.assertEqual(self._names("ozturk"), ["Öztürk"])
+        self.assertEqual(self._names("sule"), ["Öztürk"])
+        self.assertEqual(self._names("ÖZTÜRK"), ["Öztürk"])
+
+    def test_near_miss_query_matches_consonant_skeleton(self):
+        self.assertEqual(self._names("kya"), ["Kaya"])
+        self.assertEqual(self._names("smth"), ["Smith"])
+
+    def test_short_query_uses_index(self):
+        # Tek sorgu FTS, tek sorgu aday satırlar: tablo taraması yok
+        with self.assertNumQueries(2):
+            self.assertEqual(sorted(self._names("ad")), ["Lovelace", "Smith"])
+        with self.assertNumQueries(2):
+            self.assertEqual(self._names("ö"), ["Öztürk"])
+        self.assertEqual(self._names("a t"), ["Turing"])
+
+    def test_index_follows_updates_and_deletes(self):
+        appt = self.appts["Turing"]
+        appt.last_name = "Kay"
+        appt.save()
+        self.assertEqual(self._names("turing"), [])
+        self.assertEqual(self._names("alan kay"), ["Kay"])
+        appt.delete()
+        self.assertEqual(self._names("alan"), [])
+
+    def test_limit_above_candidate_limit_reads_more_candidates(self):
+        from core.search import search_appointments
+
+        with patch("core.search.CANDIDATE_LIMIT", 1):
+            self.assertEqual(len(search_appointments("ada", limit=1)), 1)
+            self.assertEqual(len(search_appointments("ada", limit=500)), 2)
+
+    def test_many_short_words_fit_search_text(self):
+        # 80 karakterlik iki isim alanı, kelime başına ^w$ ve #w# ile 400 karakteri aşar
+        appt = Appointment.objects.create(
+            location=get_default_location(),
+            first_name=" ".join(["Al"] * 27), last_name=" ".join(["Bo"] * 25) + " Zed",
+            start_datetime=datetime(2025, 4, 1, 9, tzinfo=TR_TZ),
+            therapy_type="cbt", session_format="online",
+        )
+        appt.refresh_from_db()
+        self.assertGreater(len(appt.search_text), 400)
+        self.assertEqual(self._names("zed"), [appt.last_name])
+
+    def test_staff_api_requires_staff(self):
+        from django.contrib.auth.models import User
+
+        url = reverse("staff_client_search")
+        self.assertEqual(self.client.get(url, {"q": "hopper"}).status_code, 302)
+
+        self.client.force_login(User.objects.create_superuser("staff", "s@example.com", "pw"))
+        resp = self.client.get(url, {"q": "hopper"})
+        self.assertEqual([r["last_name"] for r in resp.json()["results"]], ["Hopper"])
+        # Limit 1..100 aralığına çekilir; negatif değer sonuç listesini kırpmaz
+        resp = self.client.get(url, {"q": "hopper", "limit": "-1"})
+        self.assertEqual([r["last_name"] for r in resp.json()["results"]], ["Hopper"])
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.old = [
+            Appointment.objects.create(
+                location=get_default_location(),
+                first_name=f"Old{i}", last_name="Client",
+                start_datetime=now - timedelta(days=60 + i),
+                therapy_type="cbt", session_format="online",
+            )
+            for i in range(5)
+        ]
+        cls.recent = Appointment.objects.create(
+            location=get_default_location(),
+            first_name="Recent", last_name="Client",
+            start_datetime=now - timedelta(days=1),
+            therapy_type="couples", session_format="face_to_face",
+        )
+
+    def test_command_moves_old_rows_in_batches(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command("archive_appointments", days=30, batch_size=2, sleep=0, stdout=out)
+        self.assertIn("Batch 3: archived 1", out.getvalue())
+        self.assertEqual(list(Appointment.objects.values_list("id", flat=True)), [self.recent.id])
+        archived = AppointmentArchive.objects.get(id=self.old[0].id)
+        self.assertEqual(archived.cancel_code, self.old[0].cancel_code)
+
+    def test_lookups_fall_back_to_archive(self):
+        from core.archive import archive_batch
+
+        archive_batch(timezone.now() - timedelta(days=30), 10)
+        code = self.old[1].cancel_code
+
+        resp = self.client.get(reverse("appointments"), {"code": code})
+        self.assertTrue(resp.context["appt"].is_archived)
+        self.assertNotContains(resp, reverse("cancel", kwargs={"code": code}))
+
+        resp = self.client.get(reverse("confirm", kwargs={"code": code}))
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.context["appt"].id, self.old[1].id)
+
+        resp = self.client.get(reverse("confirm", kwargs={"code": "missing"}))
+        self.assertEqual(resp.status_code, 404)
+
+    def test_conflicting_archive_row_rolls_back_batch(self):
+        from django.core.management import CommandError, call_command
+
+        oldest = self.old[-1]
+        AppointmentArchive.objects.create(
+            id=oldest.id, first_name="Other", last_name="Row", location=oldest.location,
+            start_datetime=oldest.start_datetime, cancel_code="other-code",
+        )
+        with self.assertRaises(CommandError):
+            call_command("archive_appointments", days=30, batch_size=10, sleep=0, stdout=StringIO())
+        self.assertEqual(Appointment.objects.count(), 6)
+        self.assertEqual(AppointmentArchive.objects.count(), 1)
+
+    def test_future_cutoff_is_rejected(self):
+        from django.core.management import CommandError, call_command
+
+        for options in ({"days": -1}, {"before": (timezone.now() + timedelta(days=1)).isoformat()}):
+            with self.assertRaises(CommandError):
+                call_command("archive_appointments", sleep=0, stdout=StringIO(), **options)
+        self.assertEqual(Appointment.objects.count(), 6)
+
+
+class UtilizationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        cls.tomorrow = cls.FIXED_NOW.date() + timedelta(days=1)
+
+    def _book(self, hour, therapy_type="cbt", session_format="online"):
+        start_dt = datetime(self.tomorrow.year, self.tomorrow.month, self.tomorrow.day, hour, tzinfo=TR_TZ)
+        self.client.post(reverse("book"), {
+            "first_name": "Roll",
+            "last_name": "Up",
+            "therapy_type": therapy_type,
+            "session_format": session_format,
+            "start": iso_in_tz(start_dt),
+        })
+        return Appointment.objects.get(start_datetime=start_dt)
+
+    @patch("core.views.ist_now")
+    def test_booking_and_cancellation_update_rollups(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        appt = self._book(14)
+        self._book(15, therapy_type="couples")
+        bucket = DailyUtilization.objects.get(date=self.tomorrow, hour=14)
+        self.assertEqual((bucket.therapy_type, bucket.session_format, bucket.booked), ("cbt", "online", 1))
+
+        self.client.post(reverse("cancel", kwargs={"code": appt.cancel_code}), {"confirm_code": appt.cancel_code})
+        bucket.refresh_from_db()
+        self.assertEqual(bucket.booked, 0)
+
+    def test_rebuild_matches_appointments(self):
+        from core.analytics import rebuild
+
+        for hour, therapy_type in [(9, "cbt"), (10, "cbt"), (11, "mindfulness")]:
+            Appointment.objects.create(
+                location=get_default_location(),
+                first_name="R", last_name="B",
+                start_datetime=datetime(2025, 3, 4, hour, tzinfo=TR_TZ),
+                therapy_type=therapy_type, session_format="online",
+            )
+        DailyUtilization.objects.create(date=date(2025, 3, 4), hour=16, therapy_type="cbt", session_format="online", booked=7)
+
+        rebuild(date(2025, 3, 4), date(2025, 3, 4))
+        rows = list(DailyUtilization.objects.values_list("hour", "therapy_type", "booked"))
+        self.assertEqual(rows, [(9, "cbt", 1), (10, "cbt", 1), (11, "mindfulness", 1)])
+
+    def test_api_reads_rollups(self):
+        from django.contrib.auth.models import User
+
+        DailyUtilization.objects.create(date=date(2025, 3, 3), hour=9, therapy_type="cbt", session_format="online", booked=1)
+        DailyUtilization.objects.create(date=date(2025, 3, 4), hour=9, therapy_type="couples", session_format="online", booked=1)
+        self.client.force_login(User.objects.create_superuser("staff", "s@example.com", "pw"))
+
+        resp = self.client.get(reverse("staff_utilization_api"), {"start": "2025-03-03", "end": "2025-03-04"})
+        data = resp.json()
+        self.assertEqual(data["booked"], 2)
+        self.assertEqual(data["capacity"], 12)
+        self.assertEqual(data["by_hour"][0], {"hour": 9, "booked": 2, "capacity": 2, "utilization": 1.0})
+        self.assertEqual({r["therapy_type"]: r["booked"] for r in data["by_therapy_type"]}, {"cbt": 1, "couples": 1, "mindfulness": 0})
+
+        self.assertEqual(self.client.get(reverse("staff_utilization_api"), {"start": "bad"}).status_code, 400)
+        self.assertEqual(self.client.get(reverse("staff_utilization")).status_code, 200)
+
+    def test_capacity_covers_every_location(self):
+        from django.contrib.auth.models import User
+
+        # Test transaction'ı geri alınınca önbellekteki lokasyon listesi bayatlar
+        self.addCleanup(cache.clear)
+        Location.objects.create(
+            name="New York", slug="new-york", time_zone="America/New_York",
+            slot_hours=[8, 9], work_weekdays=[0, 1, 2, 3, 4, 5, 6],
+        )
+        # Pazartesi 09:00 her iki lokasyonda dolu, 08:00 sadece New York'ta var
+        DailyUtilization.objects.create(date=date(2025, 3, 3), hour=9, therapy_type="cbt", session_format="online", booked=2)
+        DailyUtilization.objects.create(date=date(2025, 3, 3), hour=8, therapy_type="cbt", session_format="online", booked=1)
+        self.client.force_login(User.objects.create_superuser("staff", "s@example.com", "pw"))
+
+        data = self.client.get(reverse("staff_utilization_api"), {"start": "2025-03-03", "end": "2025-03-03"}).json()
+        self.assertEqual(data["capacity"], 8)
+        by_hour = {r["hour"]: r for r in data["by_hour"]}
+        self.assertEqual(by_hour[9], {"hour": 9, "booked": 2, "capacity": 2, "utilization": 1.0})
+        self.assertEqual(by_hour[8], {"hour": 8, "booked": 1, "capacity": 1, "utilization": 1.0})
+        self.assertTrue(all(r["utilization"] <= 1 for r in data["by_hour"] + data["by_weekday"]))
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class BookCalendarCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        day = cls.FIXED_NOW.date() + timedelta(days=1)
+        cls.slot = datetime(day.year, day.month, day.day, 14, tzinfo=TR_TZ)
+
+    def setUp(self):
+        cache.clear()
+
+    def _slot_is_bookable(self, resp, dt):
+        return f'data-iso="{dt.isoformat()}"' in resp.content.decode()
+
+    @patch("core.views.ist_now")
+    def test_day_columns_served_from_fragment_cache(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        self.client.get(reverse("book"))
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse("book"))
+        self.assertTrue(self._slot_is_bookable(resp, self.slot))
+
+    @patch("core.views.ist_now")
+    def test_booking_invalidates_only_that_day(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        self.client.get(reverse("book"))
+        Appointment.objects.create(
+            location=get_default_location(),
+            first_name="C", last_name="D", start_datetime=self.slot,
+            therapy_type="cbt", session_format="online",
+        )
+        # Sadece değişen günün sütunu yeniden hesaplanır: o gün için tek sorgu
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse("book"))
+        self.assertFalse(self._slot_is_bookable(resp, self.slot))
+
+    @patch("core.views.ist_now")
+    def test_passing_slot_boundary_rerenders_today(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        today_11 = self.FIXED_NOW.replace(hour=11)
+        resp = self.client.get(reverse("book"))
+        self.assertTrue(self._slot_is_bookable(resp, today_11))
+
+        mock_now.return_value = self.FIXED_NOW.replace(hour=11, minute=30)
+        resp = self.client.get(reverse("book"))
+        self.assertFalse(self._slot_is_bookable(resp, today_11))
+
+    @patch("core.views.ist_now")
+    def test_invalid_post_keeps_form_values(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        self.client.get(reverse("book"))
+        resp = self.client.post(reverse("book"), {"first_name": "Only", "ui_format": "online"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertContains(resp, 'value="Only"')
+        self.assertTrue(self._slot_is_bookable(resp, self.slot))
+
+
+class StaticAssetPipelineTests(TestCase):
+    def setUp(self):
+        import tempfile
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        (self.root / "src").mkdir()
+        (self.root / "src" / "app.css").write_text("body { color: #333; }\n" * 100)
+
+    def _collect(self):
+        from django.core.files.storage import FileSystemStorage
+        from core.storage import CompressedManifestStaticFilesStorage
+
+        storage = CompressedManifestStaticFilesStorage(location=self.root / "out", base_url="/static/")
+        source = FileSystemStorage(location=self.root / "src")
+        with source.open("app.css") as f:
+            storage.save("app.css", f)
+        list(storage.post_process({"app.css": (source, "app.css")}))
+        return storage
+
+    def test_collect_writes_hashed_and_gzip_variants(self):
+        import gzip
+
+        storage = self._collect()
+        hashed = storage.stored_name("app.css")
+        self.assertNotEqual(hashed, "app.css")
+        data = (self.root / "out" / hashed).read_bytes()
+        self.assertEqual(gzip.decompress((self.root / "out" / (hashed + ".gz")).read_bytes()), data)
+
+    def test_middleware_negotiates_encoding_and_caches_hashed_names(self):
+        from django.test import RequestFactory
+        from core.middleware import StaticAssetMiddleware
+
+        storage = self._collect()
+        hashed = storage.stored_name("app.css")
+        with self.settings(STATIC_ROOT=str(self.root / "out")):
+            mw = StaticAssetMiddleware(lambda request: None)
+            factory = RequestFactory()
+
+            resp = mw(factory.get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip, deflate"))
+            self.assertEqual(resp["Content-Encoding"], "gzip")
+            self.assertEqual(resp["Content-Type"], "text/css")
+            self.assertIn("immutable", resp["Cache-Control"])
+            self.assertIn("Accept-Encoding", resp["Vary"])
+            resp.close()
+
+            resp = mw(factory.get(f"/static/{hashed}", HTTP_ACCEPT_ENCODING="gzip;q=0"))
+            self.assertFalse(resp.has_header("Content-Encoding"))
+            resp.close()
+
+            resp = mw(factory.get("/static/app.css"))
+            self.assertNotIn("immutable", resp["Cache-Control"])
+            resp.close()
+
+            self.assertIsNone(mw(factory.get("/static/missing.css")))
+            self.assertIsNone(mw(factory.get("/static/../secret.txt")))
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class PublicPageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        day = cls.FIXED_NOW.date() + timedelta(days=1)
+        cls.slot = datetime(day.year, day.month, day.day, 14, tzinfo=TR_TZ)
+
+    def setUp(self):
+        cache.clear()
+
+    @patch("core.views.ist_now")
+    def test_anonymous_book_hit_skips_session(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        self.assertEqual(self.client.get(reverse("book"))["X-Page-Cache"], "MISS")
+
+        client = Client(enforce_csrf_checks=True)
+        # İsabet session/auth katmanına girmez: django_session sorgusu yok
+        with self.assertNumQueries(0):
+            resp = client.get(reverse("book"))
+        self.assertEqual(resp["X-Page-Cache"], "HIT")
+        self.assertIn(day_key(get_default_location(), self.slot.date()), resp["Surrogate-Key"].split())
+        # Purge hook'u yok: proxy saklamaz, sadece uygulama içi önbellek
+        self.assertEqual(resp["Cache-Control"], "private, no-cache")
+        self.assertFalse(resp.has_header("Vary"))
+        self.assertEqual(resp["X-Frame-Options"], "DENY")
+        self.assertFalse(resp.cookies)
+        self.assertContains(resp, 'value="csrf-token-placeholder')
+
+        token = client.get(reverse("csrf_token")).json()["token"]
+        resp = client.post(reverse("book"), {
+            "csrfmiddlewaretoken": token,
+            "first_name": "Cached",
+            "last_name": "Page",
+            "therapy_type": "cbt",
+            "session_format": "online",
+            "start": iso_in_tz(self.slot),
+        })
+        self.assertEqual(resp.status_code, 302)
+        self.assertTrue(Appointment.objects.filter(start_datetime=self.slot).exists())
+
+    def test_csrf_token_endpoint_is_not_cacheable(self):
+        resp = self.client.get(reverse("csrf_token"))
+        self.assertIn("private", resp["Cache-Control"])
+        self.assertIn("csrftoken", resp.cookies)
+
+    @patch("core.views.ist_now")
+    def test_appointment_change_purges_book_page(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        self.client.get(reverse("book"))
+        Appointment.objects.create(
+            location=get_default_location(),
+            first_name="P", last_name="G", start_datetime=self.slot,
+            therapy_type="cbt", session_format="online",
+        )
+        resp = self.client.get(reverse("book"))
+        self.assertEqual(resp["X-Page-Cache"], "MISS")
+        self.assertNotIn(f'data-iso="{self.slot.isoformat()}"', resp.content.decode())
+
+    @patch("core.views.ist_now")
+    def test_pending_messages_and_staff_bypass_cache(self, mock_now):
+        from django.contrib.auth.models import User
+
+        mock_now.return_value = self.FIXED_NOW
+        self.client.get(reverse("book"))
+        resp = self.client.post(reverse("book"), {
+            "first_name": "A", "last_name": "B", "therapy_type": "cbt",
+            "session_format": "online", "start": "not-a-date",
+        }, follow=True)
+        self.assertFalse(resp.has_header("X-Page-Cache"))
+        self.assertContains(resp, "Invalid time selection.")
+
+        self.client.force_login(User.objects.create_superuser("staff", "s@example.com", "pw"))
+        self.assertFalse(self.client.get(reverse("book")).has_header("X-Page-Cache"))
+
+    @override_settings(CACHES={**SHARED_CACHES, "pages": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}})
+    def test_page_cache_is_off_without_shared_cache(self):
+        resp = self.client.get(reverse("book"))
+        self.assertFalse(resp.has_header("X-Page-Cache"))
+        self.assertFalse(resp.has_header("Surrogate-Key"))
+        self.assertNotIn("public", resp.get("Cache-Control", ""))
+        self.assertNotContains(resp, "csrf-token-placeholder")
+        self.assertIn("Cookie", resp["Vary"])
+
+    @override_settings(PAGE_CACHE_PURGE_HOOK="core.tests.record_proxy_purge")
+    def test_home_is_publicly_cacheable_with_purge_hook(self):
+        self.client.get(reverse("home"))
+        resp = self.client.get(reverse("home"))
+        self.assertEqual(resp["X-Page-Cache"], "HIT")
+        self.assertEqual(resp["Cache-Control"], "public, max-age=0, s-maxage=600")
+        self.assertEqual(resp["Surrogate-Key"], "page:home")
+
+    @override_settings(PAGE_CACHE_PURGE_HOOK="core.tests.record_proxy_purge")
+    def test_appointment_change_purges_proxy_on_commit(self):
+        PROXY_PURGES.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(
+                location=get_default_location(),
+                first_name="P", last_name="X", start_datetime=self.slot,
+                therapy_type="cbt", session_format="online",
+            )
+            self.assertEqual(PROXY_PURGES, [])
+        self.assertEqual(PROXY_PURGES, [[day_key(get_default_location(), self.slot.date())]])
+
+
+class LocationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        cls.NY_TZ = ZoneInfo("America/New_York")
+        cls.ny = Location.objects.create(
+            name="New York", slug="new-york", time_zone="America/New_York",
+            slot_hours=[1, 2, 3, 8], work_weekdays=[0, 1, 2, 3, 4, 5, 6],
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        # Test transaction'ı geri alınınca önbellekteki lokasyon listesi bayatlar
+        cache.clear()
+
+    def test_new_instances_do_not_resolve_a_location(self):
+        cache.clear()
+        with self.assertNumQueries(0):
+            appt = Appointment(first_name="No", last_name="Default")
+            entry = WaitlistEntry(first_name="No", last_name="Default")
+        self.assertIsNone(appt.location_id)
+        self.assertIsNone(entry.location_id)
+
+    def test_location_list_expires_without_shared_cache(self):
+        from unittest.mock import ANY
+        from core.locations import LOCAL_LOCATIONS_TIMEOUT, LOCATIONS_CACHE_KEY, all_locations
+
+        with patch("core.locations.cache.set") as cache_set:
+            all_locations()
+        cache_set.assert_called_once_with(LOCATIONS_CACHE_KEY, ANY, timeout=LOCAL_LOCATIONS_TIMEOUT)
+
+        with override_settings(SHARED_CACHE=SHARED_CACHES["default"]), patch("core.locations.cache.set") as cache_set:
+            all_locations()
+        cache_set.assert_called_once_with(LOCATIONS_CACHE_KEY, ANY, timeout=None)
+
+    def test_slots_follow_location_time_zone_and_skip_dst_gap(self):
+        from core.locations import slot_instants
+
+        # 2025-03-09: New York'ta 02:00 -> 03:00 ileri alınır
+        starts = slot_instants(self.ny, date(2025, 3, 9))
+        self.assertEqual([dt.hour for dt in starts], [1, 3, 8])
+        self.assertEqual(starts[0].utcoffset(), timedelta(hours=-5))
+        self.assertEqual(starts[1].utcoffset(), timedelta(hours=-4))
+        # Varsayılan lokasyonda Pazar kapalı
+        self.assertEqual(slot_instants(get_default_location(), date(2025, 3, 9)), ())
+
+    def test_schedule_fields_reject_out_of_range_and_duplicate_values(self):
+        from django.core.exceptions import ValidationError
+
+        self.ny.full_clean()
+        for field, value in (
+            ("slot_hours", [9, 24]),
+            ("slot_hours", [9, 9]),
+            ("slot_hours", ["9"]),
+            ("work_weekdays", [0, 7]),
+            ("work_weekdays", [True]),
+            ("work_weekdays", 1),
+        ):
+            location = Location(name="Bad", slug="bad", **{field: value})
+            with self.subTest(field=field, value=value), self.assertRaises(ValidationError) as ctx:
+                location.full_clean()
+            self.assertEqual(list(ctx.exception.message_dict), [field])
+
+    @patch("core.views.ist_now")
+    def test_same_instant_bookable_at_each_location(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        ny_slot = datetime(2025, 3, 4, 8, tzinfo=self.NY_TZ)
+        default_slot = ny_slot.astimezone(TR_TZ)  # 16:00 İstanbul, o da bir slot
+        for location, start in ((self.ny, ny_slot), (get_default_location(), default_slot)):
+            resp = self.client.post(f"{reverse('book')}?location={location.slug}", {
+                "location": location.slug,
+                "first_name": "Multi",
+                "last_name": "Site",
+                "therapy_type": "cbt",
+                "session_format": "online",
+                "start": start.replace(tzinfo=None).isoformat(),
+            })
+            self.assertEqual(resp.status_code, 302)
+        self.assertEqual(Appointment.objects.filter(start_datetime=ny_slot).count(), 2)
+        self.assertTrue(Appointment.objects.filter(location=self.ny, start_datetime=ny_slot).exists())
+
+        resp = self.client.post(reverse("book"), {
+            "location": self.ny.slug,
+            "first_name": "Late",
+            "last_name": "Comer",
+            "therapy_type": "cbt",
+            "session_format": "online",
+            "start": ny_slot.isoformat(),
+        }, follow=True)
+        self.assertContains(resp, "That time slot was just booked by someone else")
+
+    @patch("core.views.ist_now")
+    def test_book_page_shows_location_local_slots(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        resp = self.client.get(reverse("book"), {"location": self.ny.slug})
+        self.assertContains(resp, f'data-iso="{datetime(2025, 3, 4, 8, tzinfo=self.NY_TZ).isoformat()}"')
+        self.assertContains(resp, "America/New_York")
+        with self.settings(CACHES=SHARED_CACHES):
+            cache.clear()
+            resp = self.client.get(reverse("book"), {"location": self.ny.slug})
+        self.assertIn(f"location:{self.ny.pk}", resp["Surrogate-Key"].split())
+        self.assertEqual(self.client.get(reverse("book"), {"location": "nowhere"}).status_code, 404)
+
+    def test_rebuild_utilization_default_range_uses_location_days(self):
+        from django.core.management import call_command
+
+        # New York'ta 4 Mart akşamı, İstanbul'da 5 Mart sabahı
+        Appointment.objects.create(
+            first_name="Late", last_name="Evening", location=self.ny,
+            start_datetime=datetime(2025, 3, 4, 20, tzinfo=self.NY_TZ),
+            therapy_type="cbt", session_format="online",
+        )
+        DailyUtilization.objects.all().delete()
+        call_command("rebuild_utilization", stdout=StringIO())
+        self.assertEqual(list(DailyUtilization.objects.values_list("date", "hour")), [(date(2025, 3, 4), 20)])
+
+    @patch("core.views.ist_now")
+    def test_availability_grid_reads_all_locations_in_one_query(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        booked = datetime(2025, 3, 4, 8, tzinfo=self.NY_TZ)
+        Appointment.objects.create(
+            first_name="G", last_name="R", location=self.ny, start_datetime=booked,
+            therapy_type="cbt", session_format="online",
+        )
+        self.client.get(reverse("availability_grid"))
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse("availability_grid")).json()
+
+        by_slug = {loc["slug"]: loc for loc in data["locations"]}
+        self.assertEqual(set(by_slug), {"istanbul", "new-york"})
+        ny_slots = {s["start"]: s["available"] for d in by_slug["new-york"]["days"] for s in d["slots"]}
+        self.assertFalse(ny_slots[booked.isoformat()])
+        tr_slots = {s["start"]: s["available"] for d in by_slug["istanbul"]["days"] for s in d["slots"]}
+        self.assertTrue(tr_slots[booked.astimezone(TR_TZ).isoformat()])
+
+    @patch("core.views.ist_now")
+    def test_waitlist_hours_follow_location_schedule(self, mock_now):
+        mock_now.return_value = self.FIXED_NOW
+        resp = self.client.get(reverse("waitlist"), {"location": self.ny.slug})
+        hours = [value for value, _ in resp.context["form"].fields["hour"].choices]
+        self.assertEqual(hours, ["", "1", "2", "3", "8"])
+
+        data = {
+            "location": self.ny.slug, "first_name": "Wait", "last_name": "Er", "day": "2025-03-04",
+            "therapy_type": "cbt", "session_format": "online",
+        }
+        resp = self.client.post(reverse("waitlist"), {**data, "hour": "14"})
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn("hour", resp.context["form"].errors)
+        self.client.post(reverse("waitlist"), {**data, "hour": "8"})
+        entry = WaitlistEntry.objects.get()
+        self.assertEqual((entry.location, entry.window_start), (self.ny, datetime(2025, 3, 4, 8, tzinfo=self.NY_TZ)))
+
+    @override_settings(WAITLIST_BACKFILL_ASYNC=False)
+    @patch("core.waitlist.timezone.now")
+    def test_cancel_offers_slot_only_to_same_location(self, mock_tz_now):
+        mock_tz_now.return_value = self.FIXED_NOW
+        slot = datetime(2025, 3, 4, 14, tzinfo=TR_TZ)
+        window = {"window_start": slot - timedelta(hours=1), "window_end": slot + timedelta(hours=1)}
+        local = WaitlistEntry.objects.create(location=get_default_location(), first_name="Local", last_name="W", **window)
+        WaitlistEntry.objects.create(first_name="Remote", last_name="W", location=self.ny, **window)
+        appt = Appointment.objects.create(
+            location=get_default_location(),
+            first_name="C", last_name="X", start_datetime=slot,
+            therapy_type="cbt", session_format="online",
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("cancel", kwargs={"code": appt.cancel_code}), {"confirm_code": appt.cancel_code})
+        self.assertEqual(list(SlotClaim.objects.values_list("entry", flat=True)), [local.pk])
+
+
+@override_settings(CACHES=SHARED_CACHES)
+class WarmUpTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("core.views.ist_now")
+    def test_warm_up_primes_book_calendar(self, mock_now):
+        from core.warmup import warm_up
+
+        mock_now.return_value = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        timings = warm_up()
+        self.assertIn("warmup.templates", timings)
+        self.assertIn("warmup.availability", timings)
+        # Lokasyonlar ve gün sütunları önbellekte: ilk istek de DB'ye gitmez
+        with self.assertNumQueries(0):
+            resp = self.client.get(reverse("book"))
+        self.assertEqual(resp["X-Page-Cache"], "MISS")
+
+    def test_parse_importtime(self):
+        from core.warmup import parse_importtime
+
+        rows = parse_importtime([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     zoneinfo._common",
+            "import time:       800 |        920 |   zoneinfo",
+            "unrelated line",
+        ])
+        self.assertEqual(rows, [("zoneinfo._common", 120, 120, 2), ("zoneinfo", 800, 920, 1)])
+
+
+class OccupancyIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.FIXED_NOW = datetime(2025, 3, 3, 10, 0, tzinfo=TR_TZ)
+        cls.slot = datetime(2025, 3, 4, 14, tzinfo=TR_TZ)
+
+    def setUp(self):
+        import tempfile
+
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "occupancy.bin"
+        overrider = override_settings(OCCUPANCY_INDEX_PATH=str(self.path))
+        overrider.enable()
+        self.addCleanup(overrider.disable)
+
+    def _book(self, start):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(
+                location=get_default_location(),
+                first_name="O", last_name="X", start_datetime=start,
+                therapy_type="cbt", session_format="online",
+            )
+
+    @patch("core.views.ist_now")
+    def test_slots_read_from_bitmap_after_reconcile(self, mock_now):
+        from core.occupancy import reconcile
+        from core.views import slots_for_day
+
+        mock_now.return_value = self.FIXED_NOW
+        self._book(self.slot)
+        get_default_location()
+        # Reconcile edilmeden önce ufuk yok: DB'ye gidilir
+        with self.assertNumQueries(1):
+            slots_for_day(self.slot.date())
+
+        self.assertEqual(reconcile(date(2025, 3, 2)), (date(2025, 3, 2), None))
+        with self.assertNumQueries(0):
+            slots = {s["dt"]: s["available"] for s in slots_for_day(self.slot.date())}
+        self.assertFalse(slots[self.slot])
+        self.assertTrue(slots[self.slot.replace(hour=15)])
+
+        later = self._book(self.slot.replace(hour=15))
+        with self.assertNumQueries(0):
+            slots = {s["dt"]: s["available"] for s in slots_for_day(self.slot.date())}
+        self.assertFalse(slots[self.slot.replace(hour=15)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            later.delete()
+        slots = {s["dt"]: s["available"] for s in slots_for_day(self.slot.date())}
+        self.assertTrue(slots[self.slot.replace(hour=15)])
+
+    def test_index_is_shared_and_reconcile_corrects_drift(self):
+        from core.occupancy import OccupancyIndex, get_index, reconcile
+
+        location = get_default_location()
+        reconcile(date(2025, 3, 2))
+        self._book(self.slot)
+
+        # Başka bir worker aynı dosyayı kendi mmap'i ile açar
+        other = OccupancyIndex(self.path, get_index().horizon_days, get_index().max_locations)
+        self.assertEqual(other.booked_hours(location.pk, self.slot.date()), frozenset({14}))
+        self.assertIsNone(other.booked_hours(location.pk, date(2030, 1, 1)))
+
+        other.mark(location.pk, self.slot.date(), 9, True)
+        self.assertEqual(reconcile(date(2025, 3, 2)), (date(2025, 3, 2), 1))
+        self.assertEqual(get_index().booked_hours(location.pk, self.slot.date()), frozenset({14}))
+
+
+    def test_layout_change_replaces_file_without_truncating_mappings(self):
+        from core.occupancy import OccupancyIndex
+
+        old = OccupancyIndex(self.path, 10, 4)
+        old.rebuild(date(2025, 3, 2), lambda start, end: [(1, date(2025, 3, 4), 14)])
+        old_map = old._map
+        OccupancyIndex(self.path, 20, 4)
+        # Eski eşleme dosya kesilmediği için okunabilir kalır (kesilseydi SIGBUS)
+        self.assertEqual(old_map[len(old_map) - 1], 0)
+        restored = OccupancyIndex(self.path, 10, 4)
+        self.assertEqual(self.path.stat().st_size, restored.size)
+        # Aynı düzenle yeniden kurulan dosyayı eski worker fark eder ve yeniden açar
+        self.assertIsNone(old.booked_hours(1, date(2025, 3, 4)))
+
+
+class LoadTestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_generate_appointments_fills_free_slots_once(self):
+        from core.loadtest import generate_appointments
+
+        self.assertEqual(generate_appointments(20, days_back=3, days_ahead=3, seed=1), (20, 3))
+        self.assertEqual(Appointment.objects.count(), 20)
+        self.assertTrue(DailyUtilization.objects.exists())
+        # Pencere dolunca geçmişe doğru genişletilir, mevcut randevular tekrar kullanılmaz
+        created, days_back = generate_appointments(100, days_back=3, days_ahead=3, seed=2)
+        self.assertEqual(created, 100)
+        self.assertGreater(days_back, 3)
+        self.assertEqual(Appointment.objects.count(), 120)
+        self.assertEqual(Appointment.objects.values("location", "start_datetime").distinct().count(), 120)
+
+    def test_generate_appointments_command_rejects_unreachable_count(self):
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaisesMessage(CommandError, "cannot create"):
+            call_command("generate_appointments", count=10_000_000, stdout=StringIO())
+        self.assertEqual(Appointment.objects.count(), 0)
+
+    def test_parse_access_log_classifies_endpoints(self):
+        from core.loadtest import parse_access_log
+
+        samples = parse_access_log([
+            '1.2.3.4 - - [10/Oct/2025:13:55:36 +0000] "GET /book/?location=istanbul HTTP/1.1" 200 2326',
+            '1.2.3.4 - - [10/Oct/2025:13:55:37 +0000] "POST /book/ HTTP/1.1" 302 0',
+            '1.2.3.4 - - [10/Oct/2025:13:55:38 +0000] "GET /static/app.css HTTP/1.1" 200 10',
+            '1.2.3.4 - - [10/Oct/2025:13:55:39 +0000] "POST /cancel/abc/ HTTP/1.1" 302 0',
+            'garbage',
+        ])
+        self.assertEqual(samples, [
+            ("book", "/book/?location=istanbul"),
+            ("book_post", "/book/"),
+            ("cancel", "/cancel/abc/"),
+        ])
+
+    def test_benchmark_reports_each_level(self):
+        from core.loadtest import run_benchmark
+
+        report = run_benchmark([1, 2], duration=30, mix={"home": 1}, requests_per_worker=5)
+        self.assertEqual([level["requests"] for level in report["levels"]], [5, 10])
+        stats = report["levels"][1]["endpoints"]["home"]
+        self.assertEqual(stats["errors"], 0)
+        self.assertLessEqual(stats["p50"], stats["p99"])
+
+    def test_first_saturated_uses_p95_growth(self):
+        from core.loadtest import first_saturated, percentile
+
+        self.assertEqual(percentile([1, 2, 3, 4], 50), 2)
+        self.assertEqual(percentile([1, 2, 3, 4], 99), 4)
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+
+        def level(c, **p95):
+            return {"concurrency": c, "endpoints": {e: {"p95": v} for e, v in p95.items()}}
+
+        levels = [
+            level(1, home=0.001, book=0.010),
+            level(2, home=0.0015, book=0.015),
+            level(4, home=0.0030, book=0.025),
+        ]
+        endpoint, concurrency, ratio = first_saturated(levels)
+        self.assertEqual((endpoint, concurrency), ("home", 4))
+        self.assertAlmostEqual(ratio, 3.0)
+        self.assertIsNone(first_saturated(levels[:2]))
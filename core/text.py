@@ -0,0 +1,34 @@
+"""
+İsim normalizasyonu: arama index'ine yazılan ve sorguya uygulanan aynı katlama (fold).
+
+Aksanlar atılır ve küçük harfe çevrilir (Öztürk -> ozturk, Şahin -> sahin). Index metni her kelime
+için `^kelime$` ve sessiz harf iskeleti `#iskelet#` içerir: 3 harften kısa sorgular `" ^ka"` gibi
+trigram'lık öneklerle, harf atlanan/yanlış yazılan sorgular (Kya, Smth) iskelet eşleşmesiyle
+index'ten bulunur.
+"""
+import re
+import unicodedata
+
+# NFKD ile ayrışmayan harfler
+_EXTRA_FOLDS = str.maketrans({'ı': 'i', 'ø': 'o', 'ł': 'l', 'đ': 'd', 'æ': 'ae', 'œ': 'oe', 'ð': 'd', 'þ': 'th'})
+_word_re = re.compile(r'\w+', re.UNICODE)
+VOWELS = set('aeiou')
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize('NFKD', text.casefold().translate(_EXTRA_FOLDS))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def words(text: str):
+    return _word_re.findall(fold(text))
+
+def skeleton(word: str) -> str:
+    """İlk harf + sonraki sessizler, art arda tekrarlar tek: kaya -> ky, smith -> smth."""
+    out = word[:1]
+    for c in word[1:]:
+        if c not in VOWELS and c != out[-1]:
+            out += c
+    return out
+
+def name_search_text(first_name: str, last_name: str) -> str:
+    tokens = words(f"{first_name} {last_name}")
+    return ''.join(f" ^{w}$" for w in tokens) + ''.join(f" #{skeleton(w)}#" for w in tokens)
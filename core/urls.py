@@ -8,5 +8,13 @@ urlpatterns = [
     path('appointments/', views.appointments, name='appointments'),
     path('cancel/<str:code>/', views.cancel, name='cancel'),
     path('cancel-lookup/', views.cancel_lookup, name='cancel_lookup'),
+    path('waitlist/', views.waitlist_join, name='waitlist'),
+    path('waitlist/<str:code>/', views.waitlist_status, name='waitlist_status'),
+    path('claim/<str:token>/', views.claim_slot, name='claim_slot'),
+    path('api/availability/', views.availability_grid, name='availability_grid'),
+    path('api/csrf-token/', views.csrf_token, name='csrf_token'),
     path('api/cancel-check/', views.cancel_check, name='cancel_check'),
+    path('api/staff/client-search/', views.staff_client_search, name='staff_client_search'),
+    path('staff/utilization/', views.staff_utilization, name='staff_utilization'),
+    path('api/staff/utilization/', views.staff_utilization_api, name='staff_utilization_api'),
 ]
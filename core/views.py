@@ -1,59 +1,96 @@
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from zoneinfo import ZoneInfo
 from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from django.contrib import messages
-from django.http import JsonResponse
-from .models import Appointment
-from .forms import BookingForm
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
+from .analytics import record_booking, record_cancellation, utilization_report
+from .archive import find_by_code
+from .availability import day_key, day_versions, location_key
+from .locations import all_locations, get_default_location, get_location, locations_by_id, slot_instants
+from . import occupancy
+from .page_cache import cache_public_page
+from .models import Appointment, SlotClaim, WaitlistEntry
+from .forms import BookingForm, WaitlistForm
+from .search import search_appointments
+from .waitlist import accept_claim, schedule_backfill
 
 TR_TZ = ZoneInfo('Europe/Istanbul')
 
-SLOT_HOURS = [9, 10, 11, 14, 15, 16]
-WEEKDAYS_WORK = {0, 1, 2, 3, 4, 5}
-
 def ist_now():
     return timezone.now().astimezone(TR_TZ)
 
+def location_now(location=None):
+    """Lokasyonun yerel saati; ist_now üzerinden hesaplanır (aynı an, farklı saat dilimi)."""
+    location = location or get_default_location()
+    return ist_now().astimezone(location.tz)
+
 def is_sunday(d: date) -> bool:
     return d.weekday() == 6
 
-def generate_candidate_slot_datetimes(d: date):
-    if is_sunday(d):
-        return []
-    return [datetime(d.year, d.month, d.day, h, 0, tzinfo=TR_TZ) for h in SLOT_HOURS]
+def generate_candidate_slot_datetimes(d: date, location=None):
+    return list(slot_instants(location or get_default_location(), d))
 
-def filter_slots_for_availability(d: date):
-    today = ist_now().date()
-    if d < today:
-        return []
-    candidates = generate_candidate_slot_datetimes(d)
-    if not candidates:
-        return []
-    now = ist_now()
-    filtered = []
-    for dt in candidates:
-        if d == today and dt <= now:
-            continue
-        if Appointment.objects.filter(start_datetime=dt).exists():
-            continue
-        filtered.append(dt)
-    return filtered
-
-def slots_for_day(d: date):
+def booked_starts(location, day_from: date, day_to: date):
+    """[day_from, day_to] yerel günlerindeki dolu slotlar; tek sorgu."""
+    start = datetime(day_from.year, day_from.month, day_from.day, tzinfo=location.tz)
+    end = datetime(day_to.year, day_to.month, day_to.day, tzinfo=location.tz) + timedelta(days=1)
+    return set(
+        Appointment.objects
+        .filter(location=location, start_datetime__gte=start, start_datetime__lt=end)
+        .values_list('start_datetime', flat=True)
+    )
+
+def unavailable_starts(location, day_from: date, day_to: date):
+    """
+    booked_starts + süresi dolmamış bekleme listesi teklifinin tuttuğu slotlar; tek sorgu (UNION).
+    """
+    start = datetime(day_from.year, day_from.month, day_from.day, tzinfo=location.tz)
+    end = datetime(day_to.year, day_to.month, day_to.day, tzinfo=location.tz) + timedelta(days=1)
+    return set(
+        Appointment.objects
+        .filter(location=location, start_datetime__gte=start, start_datetime__lt=end)
+        .values_list('start_datetime', flat=True)
+        .order_by()
+        .union(held_claims(start, end).filter(entry__location=location).order_by().values_list('start_datetime', flat=True))
+    )
+
+def held_claims(start: datetime, end: datetime):
+    return SlotClaim.objects.filter(start_datetime__gte=start, start_datetime__lt=end, expires_at__gt=timezone.now())
+
+def is_held(location, start_dt: datetime) -> bool:
+    return held_claims(start_dt, start_dt + timedelta(seconds=1)).filter(entry__location=location).exists()
+
+def filter_slots_for_availability(d: date, location=None):
+    return [slot['dt'] for slot in slots_for_day(d, location) if slot['available']]
+
+def slots_for_day(d: date, location=None, booked=None):
     """Tüm slotları (boş/dolu) işaretli döndürür; Book sayfasında dolu/geçmiş saatleri sönük göstermek için."""
-    today = ist_now().date()
-    if d < today or is_sunday(d):
+    location = location or get_default_location()
+    now = location_now(location)
+    today = now.date()
+    candidates = generate_candidate_slot_datetimes(d, location)
+    if d < today or not candidates:
         return []
-
-    candidates = generate_candidate_slot_datetimes(d)
-    now = ist_now()
+    if booked is None:
+        # Paylaşımlı doluluk index'i açıksa ve gün ufuk içindeyse DB'ye gidilmez (teklifler de bitte)
+        hours = occupancy.booked_hours(location, d)
+        if hours is not None:
+            booked = {dt for dt in candidates if dt.hour in hours}
+        else:
+            booked = unavailable_starts(location, d, d)
 
     slots = []
     for dt in candidates:
         is_past = (d == today and dt <= now)
-        is_booked = Appointment.objects.filter(start_datetime=dt).exists()
+        is_booked = dt in booked
         slots.append({
             'dt': dt,
             'available': not (is_past or is_booked),
@@ -63,24 +100,92 @@ def slots_for_day(d: date):
 def week_monday(today: date) -> date:
     return today - timedelta(days=today.weekday())
 
-def days_for_this_and_next_week():
-    today = ist_now().date()
+def days_for_this_and_next_week(location=None):
+    location = location or get_default_location()
+    today = location_now(location).date()
     this_mon = week_monday(today)
     next_mon = this_mon + timedelta(days=7)
+    workdays = set(location.work_weekdays)
 
-    def mon_to_sat(mon: date):
-        days = [mon + timedelta(days=i) for i in range(6)]
-        return [d for d in days if d.weekday() in WEEKDAYS_WORK]
+    def week_days(mon: date):
+        days = [mon + timedelta(days=i) for i in range(7)]
+        return [d for d in days if d.weekday() in workdays]
 
-    this_week_all = mon_to_sat(this_mon)
+    this_week_all = week_days(this_mon)
     this_week = [d for d in this_week_all if d >= today]
-    next_week = mon_to_sat(next_mon)
+    next_week = week_days(next_mon)
     return {'this_week': this_week, 'next_week': next_week}
 
+def booking_redirect(request, appt):
+    """Başarılı rezervasyon sonrası: kodu bir kez göster, cookie'ye yaz, confirm'e yönlendir."""
+    request.session['code_to_show'] = appt.cancel_code
+
+    resp = redirect('confirm', code=appt.cancel_code)
+    max_age = 60 * 60 * 24 * 30
+    resp.set_cookie('appointment_code', appt.cancel_code, max_age=max_age, samesite='Lax')
+    return resp
+
+class DayColumn:
+    """
+    Book takvimindeki bir gün sütunu. Slotlar tembel hesaplanır: fragment önbellekteyse
+    (lokasyon, gün, müsaitlik sürümü, slot sınırı) aynı kaldığı sürece DB'ye hiç gidilmez.
+    """
+    def __init__(self, location, day: date, version, boundary: int):
+        self.location = location
+        self.day = day
+        self.version = version
+        self.boundary = boundary
+
+    @cached_property
+    def slots(self):
+        return slots_for_day(self.day, self.location)
+
+def slot_boundary(location, d: date, now: datetime) -> int:
+    """Bugün için geçmişte kalan slot sayısı; saat bir slotu geçince fragment anahtarı değişir."""
+    if d != now.date():
+        return 0
+    return sum(1 for dt in generate_candidate_slot_datetimes(d, location) if dt <= now)
+
+def requested_location(request):
+    """?location=<slug> (ya da POST'taki location); yoksa varsayılan lokasyon."""
+    slug = (request.POST.get('location') or request.GET.get('location') or '').strip()
+    location = get_location(slug) if slug else get_default_location()
+    if location is None:
+        raise Http404("Unknown location.")
+    return location
+
+def book_context(form, location):
+    weeks = days_for_this_and_next_week(location)
+    now = location_now(location)
+    versions = day_versions(location, weeks['this_week'] + weeks['next_week'])
+
+    def columns(days):
+        return [DayColumn(location, d, versions[d], slot_boundary(location, d, now)) for d in days]
+
+    return {
+        'form': form,
+        'location': location,
+        'locations': all_locations(),
+        'weeks': weeks,
+        'slots_this': columns(weeks['this_week']),
+        'slots_next': columns(weeks['next_week']),
+    }
+
+def book_page_keys(request):
+    """Book sayfası: lokasyonun ve gösterilen her günün surrogate key'i + bugünün slot sınırı."""
+    location = requested_location(request)
+    weeks = days_for_this_and_next_week(location)
+    now = location_now(location)
+    keys = ['page:book', location_key(location)] + [day_key(location, d) for d in weeks['this_week'] + weeks['next_week']]
+    return keys, f"{now.date().isoformat()}:{slot_boundary(location, now.date(), now)}"
+
+@cache_public_page(lambda request: (['page:home'], ''))
 def home(request):
     return render(request, 'home.html')
 
+@cache_public_page(book_page_keys)
 def book(request):
+    location = requested_location(request)
     if request.method == 'POST':
         data = request.POST.copy()
         if 'therapy_type' not in data and 'ui_therapy_type' in data:
@@ -89,6 +194,7 @@ def book(request):
             data['session_format'] = data.get('ui_format')
 
         form = BookingForm(data)
+        book_url = f"{reverse('book')}?location={location.slug}"
         if form.is_valid():
             first_name = form.cleaned_data['first_name'].strip()
             last_name = form.cleaned_data['last_name'].strip()
@@ -100,71 +206,107 @@ def book(request):
                 start_dt = datetime.fromisoformat(start_iso)
             except ValueError:
                 messages.error(request, "Invalid time selection.")
-                return redirect('book')
+                return redirect(book_url)
 
             if start_dt.tzinfo is None:
-                start_dt = start_dt.replace(tzinfo=TR_TZ)
+                start_dt = start_dt.replace(tzinfo=location.tz)
+            start_dt = start_dt.astimezone(location.tz)
 
             sel_date = start_dt.date()
-            if is_sunday(sel_date):
-                messages.error(request, "Selected date is not available (Sunday).")
-                return redirect('book')
+            if sel_date.weekday() not in location.work_weekdays:
+                messages.error(request, f"Selected date is not available ({sel_date:%A}).")
+                return redirect(book_url)
 
-            valid_today_slots = generate_candidate_slot_datetimes(sel_date)
+            valid_today_slots = generate_candidate_slot_datetimes(sel_date, location)
             if start_dt not in valid_today_slots:
                 messages.error(request, "Selected time is not valid.")
-                return redirect('book')
+                return redirect(book_url)
 
-            now = ist_now()
+            now = location_now(location)
             if start_dt <= now:
                 messages.error(request, "This time is no longer available.")
-                return redirect('book')
+                return redirect(book_url)
+
+            if is_held(location, start_dt):
+                # Bekleme listesindeki danışanlara teklif edildi; teklif süresi dolana kadar tutulur
+                messages.error(request, "This time is no longer available.")
+                return redirect(book_url)
 
             try:
                 with transaction.atomic():
                     appt = Appointment.objects.create(
                         first_name=first_name,
                         last_name=last_name,
+                        location=location,
                         start_datetime=start_dt,
                         therapy_type=therapy_type,
                         session_format=session_format,
                     )
+                    record_booking(appt)
             except IntegrityError:
                 messages.error(request, "That time slot was just booked by someone else. Please pick another.")
-                return redirect('book')
-
-            request.session['code_to_show'] = appt.cancel_code
-
-            resp = redirect('confirm', code=appt.cancel_code)
-            max_age = 60 * 60 * 24 * 30
-            resp.set_cookie('appointment_code', appt.cancel_code, max_age=max_age, samesite='Lax')
-            return resp
-
-        # HATALI FORM: tüm slotları (available/unavailable) hazırla ve form hatalarını şablonda göster
-        weeks = days_for_this_and_next_week()
-        slots_this = {d: slots_for_day(d) for d in weeks['this_week']}
-        slots_next = {d: slots_for_day(d) for d in weeks['next_week']}
-        return render(request, 'book.html', {
-            'form': form,
-            'weeks': weeks,
-            'slots_this': slots_this,
-            'slots_next': slots_next
-        })
+                return redirect(book_url)
 
-    form = BookingForm()
-    weeks = days_for_this_and_next_week()
-    # GET -> haftalık slotları (tümü: available/unavailable) hazırla
-    slots_this = {d: slots_for_day(d) for d in weeks['this_week']}
-    slots_next = {d: slots_for_day(d) for d in weeks['next_week']}
-    return render(request, 'book.html', {
-        'form': form,
-        'weeks': weeks,
-        'slots_this': slots_this,
-        'slots_next': slots_next
-    })
+            return booking_redirect(request, appt)
+
+        # HATALI FORM: gün sütunları önbellekten gelir, sadece form hatalarla yeniden çizilir
+        return render(request, 'book.html', book_context(form, location))
+
+    # GET -> haftalık gün sütunları (slotlar sadece fragment önbellekte yoksa hesaplanır)
+    return render(request, 'book.html', book_context(BookingForm(), location))
+
+def availability_grid(request):
+    """
+    Tüm lokasyonların iki haftalık müsaitliği. Lokasyonlar önbellekten gelir; dolu ve teklif
+    edilmiş slotlar lokasyon sayısından bağımsız olarak tek sorguyla okunur.
+    """
+    locations = all_locations()
+    weeks_by_location = {loc.pk: days_for_this_and_next_week(loc) for loc in locations}
+
+    bounds = []
+    for loc in locations:
+        days = weeks_by_location[loc.pk]['this_week'] + weeks_by_location[loc.pk]['next_week']
+        if days:
+            first, last = days[0], days[-1]
+            bounds.append(datetime(first.year, first.month, first.day, tzinfo=loc.tz))
+            bounds.append(datetime(last.year, last.month, last.day, tzinfo=loc.tz) + timedelta(days=1))
+
+    booked = defaultdict(set)
+    if bounds:
+        rows = (
+            Appointment.objects
+            .filter(start_datetime__gte=min(bounds), start_datetime__lt=max(bounds))
+            .values_list('location_id', 'start_datetime')
+            .order_by()
+            .union(held_claims(min(bounds), max(bounds)).order_by().values_list('entry__location_id', 'start_datetime'))
+        )
+        for location_id, start_dt in rows:
+            booked[location_id].add(start_dt)
+
+    result = []
+    for loc in locations:
+        weeks = weeks_by_location[loc.pk]
+        result.append({
+            'slug': loc.slug,
+            'name': loc.name,
+            'time_zone': loc.time_zone,
+            'days': [
+                {
+                    'date': d.isoformat(),
+                    'slots': [
+                        {'start': slot['dt'].isoformat(), 'available': slot['available']}
+                        for slot in slots_for_day(d, loc, booked=booked[loc.pk])
+                    ],
+                }
+                for d in weeks['this_week'] + weeks['next_week']
+            ],
+        })
+    return JsonResponse({'locations': result})
 
 def confirm(request, code: str):
-    appt = get_object_or_404(Appointment, cancel_code=code)
+    appt = find_by_code(code)
+    if appt is None:
+        raise Http404("No appointment matches the given code.")
     end_dt = appt.start_datetime + timedelta(hours=1)
     show_code = request.session.get('code_to_show') == appt.cancel_code
     if show_code:
@@ -179,9 +321,10 @@ def appointments(request):
     Bu sayfa artık genel herkese açık randevu listelemiyor.
     Kullanıcıdan code (serial key) bekliyor. Doğru code girilirse randevu gösteriliyor.
     Cookie ile otomatik bulma ve modal/JS kaldırıldı.
+    Geçmiş randevular arşivlenmiş olabilir; find_by_code arşive de bakar.
     """
     code = (request.GET.get('code') or '').strip()
-    appt = Appointment.objects.filter(cancel_code=code).first() if code else None
+    appt = find_by_code(code)
     ctx = {'appt': appt, 'code': code}
     if appt:
         ctx['end_dt'] = appt.start_datetime + timedelta(hours=1)
@@ -197,7 +340,11 @@ def cancel(request, code: str):
             messages.error(request, "Reference code does not match. Please try again.")
             return render(request, 'cancel.html', {'appt': appt, 'end_dt': end_dt})
 
-        appt.delete()
+        location_id, start_dt = appt.location_id, appt.start_datetime
+        with transaction.atomic():
+            appt.delete()
+            record_cancellation(appt)
+        schedule_backfill(location_id, start_dt)
         messages.success(request, "Your appointment has been cancelled.")
         resp = redirect('appointments')
         resp.delete_cookie('appointment_code')
@@ -213,7 +360,148 @@ def cancel_lookup(request):
         return redirect('appointments')
     return redirect('cancel', code=code)
 
+@never_cache
+def csrf_token(request):
+    """Önbellekten gelen sayfaların formları için isteğe ait CSRF token'ı (çerezi de ayarlar)."""
+    return JsonResponse({'token': get_token(request)})
+
 def cancel_check(request):
     code = (request.GET.get('code') or '').strip()
     ok = Appointment.objects.filter(cancel_code=code).exists()
     return JsonResponse({'ok': bool(ok)})
+
+@staff_member_required
+def staff_client_search(request):
+    q = (request.GET.get('q') or '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 100)
+    except ValueError:
+        limit = 20
+    locations = locations_by_id()
+    results = [
+        {
+            'id': appt.id,
+            'first_name': appt.first_name,
+            'last_name': appt.last_name,
+            'location': locations[appt.location_id].slug,
+            'start_datetime': appt.start_datetime.astimezone(locations[appt.location_id].tz).isoformat(),
+            'therapy_type': appt.therapy_type,
+            'session_format': appt.session_format,
+            'cancel_code': appt.cancel_code,
+        }
+        for appt in search_appointments(q, limit=limit)
+    ]
+    return JsonResponse({'q': q, 'results': results})
+
+DASHBOARD_DEFAULT_DAYS = 30
+DASHBOARD_MAX_DAYS = 366
+
+def parse_date_range(request):
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD; varsayılan: bugün dahil son 30 gün. Geçersizse None."""
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else ist_now().date()
+        start = (date.fromisoformat(request.GET['start']) if request.GET.get('start')
+                 else end - timedelta(days=DASHBOARD_DEFAULT_DAYS - 1))
+    except ValueError:
+        return None
+    if start > end or (end - start).days >= DASHBOARD_MAX_DAYS:
+        return None
+    return start, end
+
+@staff_member_required
+def staff_utilization(request):
+    date_range = parse_date_range(request)
+    if date_range is None:
+        messages.error(request, "Invalid date range.")
+        today = ist_now().date()
+        date_range = (today - timedelta(days=DASHBOARD_DEFAULT_DAYS - 1), today)
+    report = utilization_report(*date_range, all_locations())
+    weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    for row in report['by_weekday']:
+        row['label'] = weekday_names[row['weekday']]
+    return render(request, 'staff_utilization.html', {'report': report})
+
+@staff_member_required
+def staff_utilization_api(request):
+    date_range = parse_date_range(request)
+    if date_range is None:
+        return JsonResponse({'error': 'Invalid date range.'}, status=400)
+    return JsonResponse(utilization_report(*date_range, all_locations()))
+
+def waitlist_join(request):
+    location = requested_location(request)
+    ctx = {'location': location}
+    if request.method == 'POST':
+        form = WaitlistForm(request.POST, location=location)
+        if form.is_valid():
+            day = form.cleaned_data['day']
+            hour = form.cleaned_data['hour']
+            if day.weekday() not in location.work_weekdays:
+                messages.error(request, f"Selected date is not available ({day:%A}).")
+                return render(request, 'waitlist.html', {'form': form, **ctx})
+
+            if hour:
+                window_start = datetime(day.year, day.month, day.day, int(hour), 0, tzinfo=location.tz)
+                window_end = window_start + timedelta(hours=1)
+            else:
+                window_start = datetime(day.year, day.month, day.day, tzinfo=location.tz)
+                window_end = window_start + timedelta(days=1)
+
+            if window_end <= location_now(location):
+                messages.error(request, "This time is no longer available.")
+                return render(request, 'waitlist.html', {'form': form, **ctx})
+
+            entry = WaitlistEntry.objects.create(
+                first_name=form.cleaned_data['first_name'].strip(),
+                last_name=form.cleaned_data['last_name'].strip(),
+                location=location,
+                therapy_type=form.cleaned_data['therapy_type'],
+                session_format=form.cleaned_data['session_format'],
+                window_start=window_start,
+                window_end=window_end,
+            )
+            messages.success(request, "You have been added to the waitlist.")
+            return redirect('waitlist_status', code=entry.code)
+        return render(request, 'waitlist.html', {'form': form, **ctx})
+
+    # Book sayfasındaki dolu slottan gelindiyse gün/saat önceden doldurulur
+    initial = {}
+    start_iso = (request.GET.get('start') or '').strip()
+    if start_iso:
+        try:
+            start_dt = datetime.fromisoformat(start_iso)
+        except ValueError:
+            start_dt = None
+        if start_dt is not None:
+            if start_dt.tzinfo is None:
+                start_dt = start_dt.replace(tzinfo=location.tz)
+            start_dt = start_dt.astimezone(location.tz)
+            initial = {'day': start_dt.date(), 'hour': str(start_dt.hour)}
+    return render(request, 'waitlist.html', {'form': WaitlistForm(initial=initial, location=location), **ctx})
+
+def waitlist_status(request, code: str):
+    entry = get_object_or_404(WaitlistEntry, code=code)
+    offers = [
+        claim for claim in entry.claims.filter(expires_at__gt=timezone.now())
+        if not Appointment.objects.filter(location_id=entry.location_id, start_datetime=claim.start_datetime).exists()
+    ]
+    return render(request, 'waitlist_status.html', {'entry': entry, 'offers': offers})
+
+def claim_slot(request, token: str):
+    claim = get_object_or_404(SlotClaim.objects.select_related('entry'), token=token)
+    if request.method != 'POST':
+        return redirect('waitlist_status', code=claim.entry.code)
+
+    if claim.is_expired:
+        messages.error(request, "This offer has expired.")
+        return redirect('waitlist_status', code=claim.entry.code)
+
+    if claim.start_datetime <= timezone.now():
+        messages.error(request, "This time is no longer available.")
+        return redirect('waitlist_status', code=claim.entry.code)
+
+    appt = accept_claim(claim)
+    if appt is None:
+        messages.error(request, "That time slot was just booked by someone else. Please pick another.")
+        return redirect('waitlist_status', code=claim.entry.code)
+    return booking_redirect(request, appt)
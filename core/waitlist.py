@@ -0,0 +1,189 @@
+"""
+Waitlist backfill: iptal edilen slotları bekleme listesindeki danışanlara teklif eder.
+
+`cancel` view'i sadece `schedule_backfill` çağırır; eşleştirme commit sonrasında
+arka plan thread'inde çalışır, böylece istek süresi bekleme listesinin boyutuna bağlı değildir.
+Süresi dolmamış bir claim slotu tutar: takvimde dolu görünür ve `book` POST'u reddeder. Claim
+açılınca ve süresi dolunca (reoffer_waitlist) o günün önbelleği düşer ve doluluk index'i güncellenir;
+kabul edilince randevunun kendi sinyalleri aynısını yapar.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .analytics import record_booking
+from .locations import locations_by_id, slot_instants
+from .models import Appointment, SlotClaim, WaitlistEntry
+from .signals import invalidate_day, update_occupancy
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+def offer_size() -> int:
+    return getattr(settings, 'WAITLIST_OFFER_SIZE', 3)
+
+def claim_ttl() -> timedelta:
+    return timedelta(minutes=getattr(settings, 'WAITLIST_CLAIM_MINUTES', 15))
+
+def find_candidates(location_id: int, start_dt: datetime, limit: int):
+    """Aynı lokasyonda slotu kapsayan, bu slot için daha önce teklif almamış en eski bekleyen kayıtlar."""
+    already_offered = SlotClaim.objects.filter(entry=OuterRef('pk'), start_datetime=start_dt)
+    return list(
+        WaitlistEntry.objects
+        .filter(status='waiting', location_id=location_id, window_start__lte=start_dt, window_end__gt=start_dt)
+        .exclude(Exists(already_offered))
+        .order_by('created_at')[:limit]
+    )
+
+def offer_slot(location_id: int, start_dt: datetime):
+    """Bir lokasyondaki boş ve gelecekteki slot için en öndeki adaylara kısa ömürlü claim oluşturur."""
+    now = timezone.now()
+    if start_dt <= now:
+        return []
+    if Appointment.objects.filter(location_id=location_id, start_datetime=start_dt).exists():
+        return []
+    # Süresi dolmamış bir teklif zaten varsa yenisini açma
+    if SlotClaim.objects.filter(entry__location_id=location_id, start_datetime=start_dt, expires_at__gt=now).exists():
+        return []
+
+    expires_at = now + claim_ttl()
+    claims = []
+    for entry in find_candidates(location_id, start_dt, offer_size()):
+        try:
+            with transaction.atomic():
+                claims.append(SlotClaim.objects.create(entry=entry, start_datetime=start_dt, expires_at=expires_at))
+        except IntegrityError:
+            continue
+    if claims:
+        logger.info("Offered %s to %d waitlist entries", start_dt.isoformat(), len(claims))
+        # Slot artık tutuluyor: takvimde dolu gösterilir
+        invalidate_day(location_id, start_dt)
+        update_occupancy(location_id, start_dt, booked=True)
+    return claims
+
+def _run_offer(location_id: int, start_dt: datetime):
+    try:
+        offer_slot(location_id, start_dt)
+    except Exception:
+        logger.exception("Waitlist backfill failed for %s", start_dt.isoformat())
+    finally:
+        connections.close_all()
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waitlist-backfill')
+    return _executor
+
+def schedule_backfill(location_id: int, start_dt: datetime):
+    """Commit sonrasında eşleştirmeyi başlatır; WAITLIST_BACKFILL_ASYNC=False ise aynı thread'de çalışır."""
+    def run():
+        if getattr(settings, 'WAITLIST_BACKFILL_ASYNC', True):
+            _get_executor().submit(_run_offer, location_id, start_dt)
+        else:
+            offer_slot(location_id, start_dt)
+    transaction.on_commit(run)
+
+def accept_claim(claim: SlotClaim):
+    """
+    Claim'i randevuya çevirir. Slot başkası tarafından alındıysa ya da başlangıcı geçtiyse None döner.
+    Aynı slot için diğer açık teklifler kaldırılır.
+    """
+    # Claim TTL'i slot başlangıcını aşabilir: geçmişe randevu açılmaz
+    if claim.start_datetime <= timezone.now():
+        return None
+    entry = claim.entry
+    try:
+        with transaction.atomic():
+            appt = Appointment.objects.create(
+                first_name=entry.first_name,
+                last_name=entry.last_name,
+                location_id=entry.location_id,
+                start_datetime=claim.start_datetime,
+                therapy_type=entry.therapy_type,
+                session_format=entry.session_format,
+            )
+            record_booking(appt)
+            entry.status = 'booked'
+            entry.save(update_fields=['status'])
+            SlotClaim.objects.filter(entry__location_id=entry.location_id, start_datetime=claim.start_datetime).delete()
+            SlotClaim.objects.filter(entry=entry).delete()
+    except IntegrityError:
+        return None
+    return appt
+
+def reoffer_expired_claims():
+    """
+    Teklifleri süresi dolmuş ama hâlâ boş olan slotları sıradaki adaylara açar. Aday kalmadıysa
+    slot serbest bırakılır (takvimde yeniden boş görünür). Serbest bırakma son claim TTL'i içinde
+    süresi dolan slotlar için yapılır; komut en az TTL'de bir çalışmalıdır.
+    """
+    now = timezone.now()
+    slots = (
+        SlotClaim.objects
+        .filter(start_datetime__gt=now)
+        .values('entry__location_id', 'start_datetime')
+        .annotate(latest_expiry=Max('expires_at'))
+        .filter(latest_expiry__lte=now)
+        .order_by()
+    )
+    offered = 0
+    for slot in slots:
+        location_id, start_dt = slot['entry__location_id'], slot['start_datetime']
+        claims = offer_slot(location_id, start_dt)
+        offered += len(claims)
+        if not claims and slot['latest_expiry'] > now - claim_ttl():
+            release_slot(location_id, start_dt)
+    return offered
+
+def release_slot(location_id: int, start_dt: datetime):
+    """Süresi dolan teklifin tuttuğu slotu takvime geri verir (randevu yoksa)."""
+    if Appointment.objects.filter(location_id=location_id, start_datetime=start_dt).exists():
+        return
+    invalidate_day(location_id, start_dt)
+    update_occupancy(location_id, start_dt, booked=False)
+
+def offer_free_slots():
+    """
+    Bekleyen kayıtların pencerelerindeki boş, gelecekteki slotları teklif eder. Arka plan işi
+    kaybolursa (ör. worker yeniden başlatıldı) iptalle boşalan slot bu taramayla yine teklif edilir.
+    """
+    now = timezone.now()
+    locations = locations_by_id()
+    windows = (
+        WaitlistEntry.objects
+        .filter(status='waiting', window_end__gt=now)
+        .values_list('location_id', 'window_start', 'window_end')
+        .distinct()
+    )
+    slots = set()
+    for location_id, window_start, window_end in windows:
+        location = locations.get(location_id)
+        if location is None:
+            continue
+        day = max(window_start, now).astimezone(location.tz).date()
+        last = window_end.astimezone(location.tz).date()
+        while day <= last:
+            slots.update(
+                (location_id, dt) for dt in slot_instants(location, day)
+                if window_start <= dt < window_end and dt > now
+            )
+            day += timedelta(days=1)
+    if not slots:
+        return 0
+
+    booked = set(
+        Appointment.objects
+        .filter(start_datetime__in={dt for _, dt in slots})
+        .values_list('location_id', 'start_datetime')
+    )
+    offered = 0
+    for location_id, start_dt in sorted(slots - booked, key=lambda s: (s[1], s[0])):
+        offered += len(offer_slot(location_id, start_dt))
+    return offered
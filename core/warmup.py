@@ -0,0 +1,157 @@
+"""
+Worker ısınması (warm-up).
+
+Yeni bir gunicorn/uvicorn worker'ı ilk isteği soğuk karşılar: şablonlar derlenmemiş, saat dilimi
+verisi yüklenmemiş, DB bağlantısı yok, takvim fragment'ları boş. `warm_up` bunları istek gelmeden
+önce hazırlar; `wsgi.py`/`asgi.py` (WARMUP_ON_STARTUP) ve `manage.py warm_up` tarafından çağrılır.
+Her adımın süresi `TIMINGS`'e yazılır ve loglanır, böylece cold-start süresi izlenebilir.
+"""
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+import logging
+import os
+import re
+import subprocess
+import sys
+import time
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.http import HttpRequest
+from django.template.loader import get_template, render_to_string
+from django.urls import get_resolver, reverse
+
+from . import occupancy
+
+logger = logging.getLogger(__name__)
+
+TIMINGS = {}
+
+# Takvimin gösterdiği iki hafta + bir hafta pay
+SLOT_PRECOMPUTE_DAYS = 21
+
+@contextmanager
+def timed(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        TIMINGS[name] = time.perf_counter() - started
+
+def project_template_names():
+    """Proje şablon dizinlerindeki (TEMPLATES DIRS) tüm .html şablonları."""
+    names = []
+    for engine in settings.TEMPLATES:
+        for directory in engine.get('DIRS', []):
+            root = Path(directory)
+            names.extend(str(p.relative_to(root)) for p in sorted(root.rglob('*.html')))
+    return names
+
+def warm_templates():
+    for name in project_template_names():
+        get_template(name)
+
+def warm_urls():
+    # URLconf'u (ve dolayısıyla view/admin modüllerini) içe aktarır
+    get_resolver().url_patterns
+
+def warm_time_zones(locations):
+    ZoneInfo(settings.TIME_ZONE)
+    for location in locations:
+        location.tz
+
+def warm_connections():
+    # Kalıcı bağlantı için CONN_MAX_AGE > 0 olmalı; yoksa ilk istekte kapatılır
+    for conn in connections.all():
+        conn.ensure_connection()
+
+def warm_availability(locations):
+    """Lokasyon slot anlarını hesaplar ve her lokasyonun takvim fragment'larını önbelleğe yazar."""
+    from .forms import BookingForm
+    from .locations import precompute_slots
+    from .views import book_context, location_now
+
+    for location in locations:
+        today = location_now(location).date()
+        precompute_slots(location, today - timedelta(days=today.weekday()), SLOT_PRECOMPUTE_DAYS)
+        # Sadece şablon render'ı için; django.test'i worker'a yüklememek adına düz HttpRequest
+        request = HttpRequest()
+        request.method = 'GET'
+        request.path = request.path_info = reverse('book')
+        request.GET['location'] = location.slug
+        request.META['QUERY_STRING'] = request.GET.urlencode()
+        request.user = AnonymousUser()
+        render_to_string('book.html', book_context(BookingForm(), location), request=request)
+
+def warm_up(connect: bool = True) -> dict:
+    """
+    Tüm ısınma adımlarını çalıştırır ve {adım: saniye} döner. Bir adımın hatası worker'ı
+    düşürmez, sadece loglanır. ASGI'de sync view'lar ayrı thread'de çalıştığı için bağlantı
+    açmak anlamsızdır (connect=False).
+    """
+    from .locations import all_locations
+
+    steps = [('templates', warm_templates), ('urls', warm_urls)]
+    if connect:
+        steps.append(('connections', warm_connections))
+    steps.append(('occupancy', occupancy.get_index))
+
+    started = time.perf_counter()
+    for name, step in steps:
+        try:
+            with timed(f'warmup.{name}'):
+                step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+
+    try:
+        with timed('warmup.locations'):
+            locations = all_locations()
+        with timed('warmup.time_zones'):
+            warm_time_zones(locations)
+        with timed('warmup.availability'):
+            warm_availability(locations)
+    except Exception:
+        logger.exception("Warm-up step availability failed")
+
+    TIMINGS['warmup.total'] = time.perf_counter() - started
+    logger.info("Worker warm-up: %s", format_timings(TIMINGS))
+    return dict(TIMINGS)
+
+def startup_complete(entry_point: str, started: float, connect: bool = True):
+    """wsgi.py/asgi.py: Django kurulum süresini kaydeder, ayarlıysa warm-up çalıştırır."""
+    TIMINGS[f'{entry_point}.setup'] = time.perf_counter() - started
+    if getattr(settings, 'WARMUP_ON_STARTUP', False):
+        warm_up(connect=connect)
+    else:
+        logger.info("Worker startup: %s", format_timings(TIMINGS))
+
+def format_timings(timings: dict) -> str:
+    return ', '.join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in timings.items())
+
+_importtime_re = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+def parse_importtime(lines):
+    """`python -X importtime` çıktısı -> [(modül, self µs, cumulative µs, derinlik)]."""
+    rows = []
+    for line in lines:
+        match = _importtime_re.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+def measure_imports(module: str = 'therapy_appointment_system.wsgi'):
+    """Entry point'i temiz bir yorumlayıcıda `-X importtime` ile içe aktarır ve satırları döner."""
+    # Warm-up kapalı: sadece import + django.setup ölçülür
+    env = {**os.environ, 'DJANGO_WARMUP': '0'}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, env=env, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import failed")
+    return parse_importtime(result.stderr.splitlines())
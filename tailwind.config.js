@@ -0,0 +1,11 @@
+/** Tailwind build for static/build/app.css — run `python manage.py build_assets`. */
+module.exports = {
+  content: [
+    './templates/**/*.html',
+    './core/**/*.py',
+  ],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
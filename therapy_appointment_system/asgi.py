@@ -8,9 +8,18 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import time
+
+_started = time.perf_counter()
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'therapy_appointment_system.settings')
 
 application = get_asgi_application()
+
+# Şablonları derler, bağlantıları açar ve takvim önbelleğini doldurur (WARMUP_ON_STARTUP)
+from core.warmup import startup_complete  # noqa: E402
+
+# Sync view'lar ayrı thread'de çalışır; ana thread'de bağlantı açılmaz
+startup_complete('asgi', _started, connect=False)
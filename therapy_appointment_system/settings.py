@@ -1,5 +1,8 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -29,6 +32,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticAssetMiddleware',
+    # Must stay before SessionMiddleware: cache hits skip session, auth and messages entirely
+    'core.middleware.PageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -43,12 +49,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Şablonlar bir kez derlenir ve process ömrü boyunca bellekte tutulur
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.assets',
+                'core.context_processors.page_cache',
             ],
         },
     },
@@ -64,9 +78,47 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Bağlantılar istekler arasında yeniden kullanılır; warm-up'ta açılan bağlantı ilk isteğe kalır
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+
+# Cache
+# CACHE_URL points every worker at the same Redis (redis://, rediss://) or Memcached
+# (memcached://host:port[,host:port]) server. Availability versions, the full-page cache ('pages')
+# and the book calendar fragments ('fragments') are only correct when all workers share them, so
+# without CACHE_URL the page and fragment caches are disabled (DummyCache) and 'default' is
+# per-process memory.
+
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://', 'unix://')):
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL.startswith('memcached://'):
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': CACHE_URL.removeprefix('memcached://').split(','),
     }
+elif CACHE_URL:
+    raise ImproperlyConfigured(f"Unsupported CACHE_URL scheme: {CACHE_URL!r}")
+else:
+    SHARED_CACHE = None
+
+CACHES = {
+    'default': SHARED_CACHE or {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'therapy-appointment-system',
+    },
+    'pages': SHARED_CACHE or {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    'fragments': SHARED_CACHE or {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
 }
 
+# Dotted path to a callable that purges surrogate keys from the CDN/reverse proxy in front of the
+# app, e.g. 'myproject.cdn.purge' taking a list of keys. Cached pages are only sent with a shared
+# s-maxage when it is set; otherwise they are private and only the in-app page cache stores them.
+PAGE_CACHE_PURGE_HOOK = os.environ.get('PAGE_CACHE_PURGE_HOOK') or None
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -104,6 +156,59 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATICFILES_DIRS = [BASE_DIR / 'static']
+
+# collectstatic output, served by core.middleware.StaticAssetMiddleware
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        # Hashed names + .gz/.br variants; plain storage in development so no manifest is needed
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+        else 'core.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# Use the vendored/compiled assets once `manage.py build_assets` has produced them; CDN otherwise.
+SELF_HOSTED_ASSETS = (BASE_DIR / 'static' / 'build' / 'app.css').is_file()
+
+# Worker warm-up
+# Compile templates, open DB connections and prime the calendar cache when wsgi.py/asgi.py is
+# imported. On by default outside DEBUG; DJANGO_WARMUP=0/1 overrides. With gunicorn, do not use
+# --preload (connections opened before fork must not be shared between workers).
+
+WARMUP_ON_STARTUP = os.environ.get('DJANGO_WARMUP', '0' if DEBUG else '1') == '1'
+
+
+# Occupancy index
+# Path of the memory-mapped (location, day, hour) bitmap shared by all workers on a host; unset
+# disables it. Run `manage.py reconcile_occupancy` at least daily to rebuild it and roll the horizon.
+# The directory must be writable: workers lock `<path>.lock` and swap in new layouts via a temp file.
+
+OCCUPANCY_INDEX_PATH = os.environ.get('OCCUPANCY_INDEX_PATH') or None
+OCCUPANCY_HORIZON_DAYS = 60
+OCCUPANCY_MAX_LOCATIONS = 64
+
+
+# Locations
+# Slug of the clinic used when a request does not name one (created by migration 0009).
+
+DEFAULT_LOCATION = 'istanbul'
+
+
+# Waitlist backfill
+# Number of waitlist entries a freed slot is offered to at once, and how long each offer is held.
+
+WAITLIST_OFFER_SIZE = 3
+
+WAITLIST_CLAIM_MINUTES = 15
+
+# Run the cancellation -> waitlist matching on a background thread after commit.
+WAITLIST_BACKFILL_ASYNC = True
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
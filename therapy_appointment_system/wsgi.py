@@ -8,9 +8,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
 
 import os
+import time
+
+_started = time.perf_counter()
 
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'therapy_appointment_system.settings')
 
 application = get_wsgi_application()
+
+# Şablonları derler, bağlantıları açar ve takvim önbelleğini doldurur (WARMUP_ON_STARTUP)
+from core.warmup import startup_complete  # noqa: E402
+
+startup_complete('wsgi', _started)